@@ -0,0 +1,129 @@
+"""initial schema
+
+Matches what `Base.metadata.create_all` used to build at startup. Databases
+created that way should be stamped rather than upgraded:
+
+    alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 15:28:55.699323
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+EMAIL_STATUS = sa.Enum(
+    'draft', 'awaiting_review', 'queued', 'sent', 'delivered', 'failed', 'replied',
+    name='emailstatus',
+)
+EVENT_TYPE = sa.Enum(
+    'sent', 'delivered', 'open', 'click', 'bounce', 'spam', 'reply',
+    name='eventtype',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('product_name', sa.String(), nullable=True),
+        sa.Column('product_description', sa.Text(), nullable=True),
+        sa.Column('base_prompt_template', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_campaigns_id', 'campaigns', ['id'])
+
+    op.create_table(
+        'contacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('company', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.Column('hobbies', sa.Text(), nullable=True),
+        sa.Column('mbti_type', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_contacts_email', 'contacts', ['email'])
+    op.create_index('ix_contacts_id', 'contacts', ['id'])
+
+    op.create_table(
+        'sequence_steps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('step_number', sa.Integer(), nullable=False),
+        sa.Column('offset_days', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sequence_steps_id', 'sequence_steps', ['id'])
+
+    op.create_table(
+        'email_instances',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('contact_id', sa.Integer(), nullable=False),
+        sa.Column('sequence_step_id', sa.Integer(), nullable=True),
+        sa.Column('is_reply', sa.Boolean(), nullable=True),
+        sa.Column('parent_email_id', sa.Integer(), nullable=True),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body_text', sa.Text(), nullable=False),
+        sa.Column('status', EMAIL_STATUS, nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('provider_message_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['contact_id'], ['contacts.id']),
+        sa.ForeignKeyConstraint(['parent_email_id'], ['email_instances.id']),
+        sa.ForeignKeyConstraint(['sequence_step_id'], ['sequence_steps.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_email_instances_id', 'email_instances', ['id'])
+
+    op.create_table(
+        'email_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email_id', sa.Integer(), nullable=False),
+        sa.Column('event_type', EVENT_TYPE, nullable=False),
+        sa.Column('event_metadata', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['email_id'], ['email_instances.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_email_events_id', 'email_events', ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_events_id', table_name='email_events')
+    op.drop_table('email_events')
+    op.drop_index('ix_email_instances_id', table_name='email_instances')
+    op.drop_table('email_instances')
+    op.drop_index('ix_sequence_steps_id', table_name='sequence_steps')
+    op.drop_table('sequence_steps')
+    op.drop_index('ix_contacts_id', table_name='contacts')
+    op.drop_index('ix_contacts_email', table_name='contacts')
+    op.drop_table('contacts')
+    op.drop_index('ix_campaigns_id', table_name='campaigns')
+    op.drop_table('campaigns')
+
+    bind = op.get_bind()
+    EVENT_TYPE.drop(bind, checkfirst=True)
+    EMAIL_STATUS.drop(bind, checkfirst=True)
@@ -0,0 +1,76 @@
+"""composite indexes for the hot query shapes
+
+- generate_emails: (campaign_id, contact_id, sequence_step_id) where not is_reply
+- send_emails:     (campaign_id, sequence_step_id, status) where not is_reply
+- status summary:  (campaign_id, status)
+- list_emails:     (campaign_id, id) for keyset pages
+- analytics:       email_events (email_id, event_type)
+- step lookup:     sequence_steps (campaign_id, step_number)
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside the
+migration transaction, so they can be rolled out without locking writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 15:41:12.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+NOT_REPLY = sa.text('is_reply = false')
+
+INDEXES = [
+    ('ix_email_instances_campaign_contact_step', 'email_instances',
+     ['campaign_id', 'contact_id', 'sequence_step_id'], NOT_REPLY),
+    ('ix_email_instances_campaign_step_status', 'email_instances',
+     ['campaign_id', 'sequence_step_id', 'status'], NOT_REPLY),
+    ('ix_email_instances_campaign_status', 'email_instances', ['campaign_id', 'status'], None),
+    ('ix_email_instances_campaign_id_id', 'email_instances', ['campaign_id', 'id'], None),
+    ('ix_email_events_email_id_event_type', 'email_events', ['email_id', 'event_type'], None),
+    ('ix_sequence_steps_campaign_step', 'sequence_steps', ['campaign_id', 'step_number'], None),
+]
+
+
+def create_index_online(name, table, columns, where=None) -> None:
+    """CREATE INDEX CONCURRENTLY on PostgreSQL, plain CREATE INDEX elsewhere."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                name, table, columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(name, table, columns, sqlite_where=where, if_not_exists=True)
+
+
+def drop_index_online(name, table) -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, where in INDEXES:
+        create_index_online(name, table, columns, where)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        drop_index_online(name, table)
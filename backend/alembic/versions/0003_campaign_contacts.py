@@ -0,0 +1,70 @@
+"""campaign-scoped contact membership and unique contact emails
+
+- campaign_contacts(campaign_id, contact_id) links a campaign to its audience.
+- contacts.email is normalized (trim + lowercase) and duplicates are merged
+  into the lowest id, re-pointing their email_instances.
+- Membership is backfilled from existing email_instances; contacts that never
+  had an email generated cannot be attributed to a campaign and stay unlinked.
+- ix_contacts_email becomes unique so imports can upsert on it.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 16:52:03.441870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'campaign_contacts',
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('contact_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['contact_id'], ['contacts.id']),
+        sa.PrimaryKeyConstraint('campaign_id', 'contact_id'),
+    )
+    op.create_index('ix_campaign_contacts_contact_id', 'campaign_contacts', ['contact_id'])
+
+    op.execute("UPDATE contacts SET email = lower(trim(email))")
+    op.execute(
+        """
+        UPDATE email_instances SET contact_id = (
+            SELECT min(keep.id) FROM contacts keep
+            JOIN contacts dup ON dup.email = keep.email
+            WHERE dup.id = email_instances.contact_id
+        )
+        WHERE contact_id NOT IN (SELECT min(id) FROM contacts GROUP BY email)
+        """
+    )
+    op.execute("DELETE FROM contacts WHERE id NOT IN (SELECT min(id) FROM contacts GROUP BY email)")
+
+    op.execute(
+        """
+        INSERT INTO campaign_contacts (campaign_id, contact_id, created_at)
+        SELECT DISTINCT campaign_id, contact_id, CURRENT_TIMESTAMP FROM email_instances
+        """
+    )
+
+    op.drop_index('ix_contacts_email', table_name='contacts')
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema. Merged duplicate contacts are not restored."""
+    op.drop_index('ix_contacts_email', table_name='contacts')
+    op.create_index('ix_contacts_email', 'contacts', ['email'])
+    op.drop_index('ix_campaign_contacts_contact_id', table_name='campaign_contacts')
+    op.drop_table('campaign_contacts')
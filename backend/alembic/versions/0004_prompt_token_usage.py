@@ -0,0 +1,39 @@
+"""per-draft token usage and cached campaign product summary
+
+- email_instances.prompt_tokens / completion_tokens: tokens used to
+  generate the draft (provider-reported when available, else estimated).
+- campaigns.product_summary: product description condensed once per
+  campaign for generation prompts.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 18:05:12.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_instances', sa.Column('prompt_tokens', sa.Integer(), nullable=True))
+    op.add_column('email_instances', sa.Column('completion_tokens', sa.Integer(), nullable=True))
+    op.add_column('campaigns', sa.Column('product_summary', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.drop_column('product_summary')
+    with op.batch_alter_table('email_instances') as batch_op:
+        batch_op.drop_column('completion_tokens')
+        batch_op.drop_column('prompt_tokens')
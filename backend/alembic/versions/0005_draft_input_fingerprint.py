@@ -0,0 +1,32 @@
+"""draft input fingerprints for incremental regeneration
+
+- email_instances.input_fingerprint: sha256 of the contact, product,
+  template, step and model a draft was generated from.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 19:21:40.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_instances', sa.Column('input_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('email_instances') as batch_op:
+        batch_op.drop_column('input_fingerprint')
@@ -0,0 +1,61 @@
+"""suppression list for bounced and spam-reporting recipients
+
+- suppressions(email unique, reason, email_instance_id, created_at).
+- Backfilled from existing bounce/spam email_events; an address with a spam
+  report is recorded as spam, otherwise as bounce.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 20:02:17.904451
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'suppressions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('email_instance_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['email_instance_id'], ['email_instances.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_suppressions_id', 'suppressions', ['id'])
+    op.create_index('ix_suppressions_email', 'suppressions', ['email'], unique=True)
+
+    op.execute(
+        """
+        INSERT INTO suppressions (email, reason, email_instance_id, created_at)
+        SELECT lower(c.email),
+               CASE WHEN sum(CASE WHEN e.event_type = 'spam' THEN 1 ELSE 0 END) > 0
+                    THEN 'spam' ELSE 'bounce' END,
+               max(ei.id),
+               min(e.created_at)
+        FROM email_events e
+        JOIN email_instances ei ON ei.id = e.email_id
+        JOIN contacts c ON c.id = ei.contact_id
+        WHERE e.event_type IN ('bounce', 'spam')
+        GROUP BY lower(c.email)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_suppressions_email', table_name='suppressions')
+    op.drop_index('ix_suppressions_id', table_name='suppressions')
+    op.drop_table('suppressions')
@@ -0,0 +1,33 @@
+"""track which product description the stored summary was made from
+
+- campaigns.product_summary_source: sha256 of the product_description that
+  product_summary condenses; the summary is redone when they differ.
+  Existing summaries have no source and are redone on next generation.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 22:41:05.316027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('campaigns', sa.Column('product_summary_source', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.drop_column('product_summary_source')
@@ -1,24 +1,138 @@
-from sqlalchemy import create_engine
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from .config import settings
+from .services.query_stats import record_query
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def _pool_kwargs(url: str) -> dict:
+    # SQLite (dev only) keeps SQLAlchemy's default pool; sizing knobs are for Postgres.
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+
+def _async_url(url: str) -> str:
+    """Map the sync DATABASE_URL onto its async driver (psycopg 3 / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def instrument_engine(bind) -> None:
+    """Time every statement and feed it to the per-request query stats."""
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        record_query(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(bind, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            started = conn.info["query_started"].pop()
+            record_query(exception_context.statement or "", time.perf_counter() - started)
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    **_pool_kwargs(settings.DATABASE_URL),
 )
 
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Optional read replica for dashboard/list traffic; falls back to the primary.
+if settings.DATABASE_READ_URL:
+    read_engine = create_engine(
+        settings.DATABASE_READ_URL,
+        pool_pre_ping=True,
+        **_pool_kwargs(settings.DATABASE_READ_URL),
+    )
+    instrument_engine(read_engine)
+    if read_engine.dialect.name == "postgresql":
+        read_engine = read_engine.execution_options(postgresql_readonly=True)
+else:
+    read_engine = engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Set after a successful write so that client's next reads see it (replica lag).
+READ_PRIMARY_COOKIE = "db_read_primary_until"
+
+
+ASYNC_DATABASE_URL = settings.DATABASE_ASYNC_URL or _async_url(settings.DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    **_pool_kwargs(ASYNC_DATABASE_URL),
+)
+
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def wants_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints. Uses DATABASE_READ_URL when configured,
+    except right after this client wrote something (read-your-writes).
+    """
+    factory = SessionLocal if wants_primary(request) else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Session dependency for `async def` routes; never blocks the event loop."""
+    async with AsyncSessionLocal() as db:
+        yield db
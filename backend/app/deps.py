@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Query
+
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Response header carrying the cursor for the next page (absent on the last page).
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Turn the last seen primary key into an opaque, URL-safe cursor."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@dataclass
+class PageParams:
+    limit: int
+    after_id: Optional[int]
+
+
+def get_page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+) -> PageParams:
+    """Keyset pagination on `id`: pass back the cursor from the previous page."""
+    return PageParams(limit=limit, after_id=decode_cursor(cursor))
+
+
+def parse_fields(fields: Optional[str], allowed: Dict[str, object]) -> List[str]:
+    """
+    Resolve a comma-separated `fields=` projection against the allowed columns.
+    `id` is always included because the cursor is built from it.
+    """
+    if not fields:
+        return list(allowed)
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {unknown}. Allowed: {sorted(allowed)}",
+        )
+    return ["id"] + [f for f in allowed if f in requested and f != "id"]
@@ -1,12 +1,49 @@
-from fastapi import FastAPI
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from .db import READ_PRIMARY_COOKIE, read_engine, engine
+from .deps import NEXT_CURSOR_HEADER
+from .routers import upload, campaigns, emails, webhooks, metrics
+from .services.query_stats import (
+    API_PREFIX,
+    QUERY_COUNT_HEADER,
+    SERVER_TIMING_HEADER,
+    RequestQueryStats,
+    checked_stream,
+    current_query_stats,
+    finish_request,
+    query_stats_headers,
+    route_key,
+)
+
+logger = logging.getLogger(__name__)
 
-from .db import Base, engine
-from .routers import upload, campaigns, emails, webhooks
 
-Base.metadata.create_all(bind=engine)
+def _warm_imports():
+    """Load the heavy, lazily imported modules once the worker is already serving."""
+    try:
+        from .services import agent, import_staging  # noqa: F401
+    except Exception:
+        logger.exception("background import warm-up failed")
 
-app = FastAPI(title="Email Automation App")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing app.main stays cheap (no DDL, no provider clients, no
+    # langchain/pandas); see benchmarks/bench_startup.py for the budget.
+    if settings.WARM_IMPORTS_ON_STARTUP:
+        threading.Thread(target=_warm_imports, name="warm-imports", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Email Automation App", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,9 +54,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, SERVER_TIMING_HEADER],
 )
 
-app.include_router(upload.router, prefix="/api")
-app.include_router(campaigns.router, prefix="/api")
-app.include_router(emails.router, prefix="/api")
-app.include_router(webhooks.router, prefix="/api")
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Pin a client's reads to the primary briefly after it writes (replica lag)."""
+    response = await call_next(request)
+    if (
+        read_engine is not engine
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+        # SendGrid/inbound webhooks are not a dashboard client
+        and not request.url.path.startswith("/api/webhooks/")
+    ):
+        secure = request.url.scheme == "https"
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            secure=secure,
+            samesite="none" if secure else "lax",
+        )
+    return response
+
+
+@app.middleware("http")
+async def query_stats(request: Request, call_next):
+    """Count SQL statements per request; see services/query_stats.py."""
+    stats = RequestQueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+
+    route = route_key(request.method, getattr(request.scope.get("route"), "path", "unmatched"))
+    if "content-length" not in response.headers:
+        # Streamed: the body's queries have not run yet
+        response.body_iterator = checked_stream(response.body_iterator, route, stats)
+        return response
+    problems = finish_request(route, stats)
+    if problems and settings.DB_QUERY_BUDGET_STRICT:
+        response = JSONResponse({"detail": problems}, status_code=500)
+    if settings.DB_QUERY_HEADERS:
+        response.headers.update(query_stats_headers(stats))
+    return response
+
+
+app.include_router(upload.router, prefix=API_PREFIX)
+app.include_router(campaigns.router, prefix=API_PREFIX)
+app.include_router(emails.router, prefix=API_PREFIX)
+app.include_router(webhooks.router, prefix=API_PREFIX)
+app.include_router(metrics.router)
@@ -11,6 +11,8 @@ from sqlalchemy import (
     Text,
     JSON,
     Boolean,
+    Index,
+    false,
 )
 from sqlalchemy.orm import relationship
 
@@ -41,7 +43,8 @@ class Contact(Base):
     __tablename__ = "contacts"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, index=True, nullable=False)
+    # Stored trimmed and lowercased (see contacts_import.clean_contacts_frame)
+    email = Column(String, index=True, unique=True, nullable=False)
     first_name = Column(String, nullable=True)
     company = Column(String, nullable=True)
     role = Column(String, nullable=True)
@@ -50,6 +53,7 @@ class Contact(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     emails = relationship("EmailInstance", back_populates="contact")
+    campaigns = relationship("Campaign", secondary="campaign_contacts", viewonly=True)
 
 
 class Campaign(Base):
@@ -60,10 +64,25 @@ class Campaign(Base):
     product_name = Column(String, nullable=True)
     product_description = Column(Text, nullable=True)
     base_prompt_template = Column(Text, nullable=True)
+    # product_description condensed once for generation prompts (services/prompt_builder.py)
+    product_summary = Column(Text, nullable=True)
+    # sha256 of the product_description that product_summary was made from
+    product_summary_source = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     steps = relationship("SequenceStep", back_populates="campaign")
     emails = relationship("EmailInstance", back_populates="campaign")
+    contacts = relationship("Contact", secondary="campaign_contacts", viewonly=True)
+
+
+class CampaignContact(Base):
+    """Which contacts belong to which campaign's audience."""
+
+    __tablename__ = "campaign_contacts"
+
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), primary_key=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id"), primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class SequenceStep(Base):
@@ -78,6 +97,10 @@ class SequenceStep(Base):
     campaign = relationship("Campaign", back_populates="steps")
     emails = relationship("EmailInstance", back_populates="sequence_step")
 
+    __table_args__ = (
+        Index("ix_sequence_steps_campaign_step", "campaign_id", "step_number"),
+    )
+
 
 class EmailInstance(Base):
     __tablename__ = "email_instances"
@@ -97,6 +120,12 @@ class EmailInstance(Base):
     sent_at = Column(DateTime, nullable=True)
 
     provider_message_id = Column(String, nullable=True)
+    # LLM usage for generated drafts; provider-reported, else estimated
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    # Hash of the generation inputs (prompt_builder.generation_fingerprint);
+    # regenerate only redoes drafts whose inputs changed. NULL = template fallback.
+    input_fingerprint = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -106,6 +135,26 @@ class EmailInstance(Base):
     events = relationship("EmailEvent", back_populates="email", cascade="all, delete-orphan")
     parent_email = relationship("EmailInstance", remote_side=[id])
 
+    # Indexes are managed by alembic (see alembic/versions); keep these in sync.
+    __table_args__ = (
+        # generate_emails: existing draft for (campaign, contact, step)
+        Index(
+            "ix_email_instances_campaign_contact_step",
+            "campaign_id", "contact_id", "sequence_step_id",
+            postgresql_where=(is_reply == false()),
+            sqlite_where=(is_reply == false()),
+        ),
+        # send_emails: pending drafts for (campaign, step)
+        Index(
+            "ix_email_instances_campaign_step_status",
+            "campaign_id", "sequence_step_id", "status",
+            postgresql_where=(is_reply == false()),
+            sqlite_where=(is_reply == false()),
+        ),
+        Index("ix_email_instances_campaign_status", "campaign_id", "status"),
+        Index("ix_email_instances_campaign_id_id", "campaign_id", "id"),
+    )
+
 
 class EmailEvent(Base):
     __tablename__ = "email_events"
@@ -117,3 +166,20 @@ class EmailEvent(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     email = relationship("EmailInstance", back_populates="events")
+
+    __table_args__ = (
+        Index("ix_email_events_email_id_event_type", "email_id", "event_type"),
+    )
+
+
+# Addresses we must not send to again (bounced or reported spam); fed by the
+# SendGrid webhook and mirrored in memory by services/suppression.py
+class Suppression(Base):
+    __tablename__ = "suppressions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Trimmed and lowercased, like contacts.email
+    email = Column(String, index=True, unique=True, nullable=False)
+    reason = Column(String, nullable=False)  # EventType value: bounce / spam
+    email_instance_id = Column(Integer, ForeignKey("email_instances.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
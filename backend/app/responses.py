@@ -0,0 +1,47 @@
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+try:  # optional: pip install "backend[fast-json]"
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+# -------------------------------------------------------------------
+# Fast JSON path for large list/status responses (FAST_JSON_RESPONSES).
+# Rows go straight from column tuples to dicts to bytes, skipping one
+# pydantic model per row and FastAPI's jsonable_encoder pass. Output
+# matches what the response_model would produce; orjson is used when
+# installed, else the stdlib encoder.
+# -------------------------------------------------------------------
+
+
+def _default(value: Any):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Naive datetimes stay offset-less, as pydantic renders them
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_as_dicts(rows: Iterable[Sequence], names: List[str]) -> List[dict]:
+    """Column tuples -> dicts keyed by the selected column names."""
+    return [dict(zip(names, row)) for row in rows]
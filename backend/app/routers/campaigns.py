@@ -1,89 +1,219 @@
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..models import Campaign, SequenceStep, Contact, EmailInstance, EmailStatus
+from ..config import settings
+from ..db import AsyncSessionLocal, ReadSessionLocal, SessionLocal, engine, get_db, read_engine, wants_primary
+from ..deps import PageParams, get_page_params, encode_cursor
+from ..models import Campaign, CampaignContact, SequenceStep, Contact, EmailInstance, EmailStatus, EventType
+from ..responses import dumps
 from ..schemas import (
     GenerateEmailsRequest,
     EmailInstanceBase,
     CampaignStatusSummary,
 )
 
-from ..services.agent import get_email_agent 
+from ..services.campaign_cache import (
+    get_cache_backend,
+    summary_cache_key,
+    bump_campaign_version,
+    bumped_within,
+    make_etag,
+    etag_matches,
+)
+from ..services.campaign_export import EXPORT_FORMATS, export_filename, stream_campaign_export
+from ..services.campaign_events import campaign_event_stream, get_event_hub
+from ..services.metrics import LLM_CHAIN_SECONDS
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
 
 
+# Drafts that regenerate may replace; anything queued or sent stays as is.
+REGENERATE_STATUSES = (EmailStatus.draft, EmailStatus.awaiting_review)
+
+# Clients may reuse a summary only after revalidating it with If-None-Match.
+SUMMARY_CACHE_CONTROL = "private, no-cache"
+
+
 @router.get("/{campaign_id}", response_model=CampaignStatusSummary)
 def get_campaign_status(
     campaign_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    page: PageParams = Depends(get_page_params),
 ):
-    from ..schemas import EmailAnalytics
+    """
+    Campaign summary, cached per campaign version. Webhooks, sends and
+    generation bump the version, so a cache hit is always current for
+    this process (or for all workers when CACHE_URL is set).
+    """
+    cache = get_cache_backend()
+    key = summary_cache_key(campaign_id, page.limit, page.after_id)
+    entry = cache.get(key)
+    if entry is None:
+        factory = SessionLocal if wants_primary(request) else ReadSessionLocal
+        with factory() as db:
+            summary = build_campaign_summary(db, campaign_id, page)
+        if settings.FAST_JSON_RESPONSES:
+            body = dumps(summary)
+        else:
+            body = CampaignStatusSummary.model_validate(summary).model_dump_json().encode()
+        entry = (make_etag(body), body)
+        # Right after a bump the replica may not have replayed the change yet:
+        # serve its result, but do not cache it (or its ETag) under the new version.
+        from_replica = factory is ReadSessionLocal and read_engine is not engine
+        if not (from_replica and bumped_within(campaign_id, settings.READ_YOUR_WRITES_SECONDS)):
+            cache.set(key, entry)
+
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": SUMMARY_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{campaign_id}/events")
+async def stream_campaign_events(campaign_id: int, request: Request):
+    """
+    Live status for one campaign as server-sent events: a `snapshot` of the
+    status counts, then `delta` events as webhooks and sends change emails
+    (see services/campaign_events.py). On `resync` the client refetches
+    GET /campaigns/{id} and reconnects.
+    """
+    hub = get_event_hub()
+    sub = hub.subscribe(campaign_id)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many live status viewers; poll GET /campaigns/{id}")
+    try:
+        # Subscribed first so nothing committed after the snapshot is missed.
+        # A short-lived session: the stream must not hold a connection open.
+        async with AsyncSessionLocal() as db:
+            if await db.get(Campaign, campaign_id) is None:
+                raise HTTPException(status_code=404, detail="Campaign not found")
+            result = await db.execute(
+                select(EmailInstance.status, func.count(EmailInstance.id))
+                .where(EmailInstance.campaign_id == campaign_id)
+                .group_by(EmailInstance.status)
+            )
+            status_counts = {status.value: n for status, n in result}
+    except BaseException:
+        hub.unsubscribe(sub)
+        raise
+
+    snapshot = {"total_emails": sum(status_counts.values()), "status": status_counts}
+    return StreamingResponse(
+        campaign_event_stream(hub, sub, snapshot, request.is_disconnected),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{campaign_id}/export")
+def export_campaign(
+    campaign_id: int,
+    request: Request,
+    fmt: Literal["csv", "parquet"] = Query("csv", alias="format"),
+):
+    """
+    Every email of the campaign with its recipient and open/click/bounce
+    counts, streamed as CSV or Parquet in constant memory
+    (see services/campaign_export.py).
+    """
+    factory = SessionLocal if wants_primary(request) else ReadSessionLocal
+    with factory() as db:
+        if db.get(Campaign, campaign_id) is None:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+
+    media_type, _ = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        stream_campaign_export(factory, campaign_id, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(campaign_id, fmt)}"'},
+    )
+
+
+def build_campaign_summary(db: Session, campaign_id: int, page: PageParams) -> dict:
+    """The CampaignStatusSummary payload as plain values (no per-row models)."""
     from ..models import EmailEvent
 
     campaign = db.get(Campaign, campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
-    total = db.query(EmailInstance).filter(EmailInstance.campaign_id == campaign_id).count()
-    sent = db.query(EmailInstance).filter(
-        EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.sent
-    ).count()
-    delivered = db.query(EmailInstance).filter(
-        EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.delivered
-    ).count()
-    failed = db.query(EmailInstance).filter(
-        EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.failed
-    ).count()
-    replied = db.query(EmailInstance).filter(
-        EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.replied
-    ).count()
-    draft = db.query(EmailInstance).filter(
-        EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.draft
-    ).count()
-
-    # Get sent emails with analytics
-    sent_emails_data = db.query(EmailInstance, Contact.email, Contact.first_name).join(
+    # One grouped count instead of a COUNT(*) per status
+    status_counts = dict(
+        db.query(EmailInstance.status, func.count(EmailInstance.id))
+        .filter(EmailInstance.campaign_id == campaign_id)
+        .group_by(EmailInstance.status)
+        .all()
+    )
+    total = sum(status_counts.values())
+
+    # Get one page of sent emails with analytics (keyset on id, skipping body_text)
+    sent_query = db.query(
+        EmailInstance.id,
+        EmailInstance.subject,
+        EmailInstance.status,
+        EmailInstance.sent_at,
+        Contact.email,
+        Contact.first_name,
+    ).join(
         Contact, EmailInstance.contact_id == Contact.id
-    ).filter(EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.sent).all()
+    ).filter(EmailInstance.campaign_id == campaign_id, EmailInstance.status == EmailStatus.sent)
+    if page.after_id is not None:
+        sent_query = sent_query.filter(EmailInstance.id > page.after_id)
+    sent_emails_data = sent_query.order_by(EmailInstance.id).limit(page.limit + 1).all()
+
+    next_cursor = None
+    if len(sent_emails_data) > page.limit:
+        sent_emails_data = sent_emails_data[: page.limit]
+        next_cursor = encode_cursor(sent_emails_data[-1].id)
+
+    # Event counts for the whole page in one grouped query
+    event_counts: dict = {}
+    page_ids = [row.id for row in sent_emails_data]
+    if page_ids:
+        for email_id, event_type, n in (
+            db.query(EmailEvent.email_id, EmailEvent.event_type, func.count(EmailEvent.id))
+            .filter(
+                EmailEvent.email_id.in_(page_ids),
+                EmailEvent.event_type.in_(['open', 'click', 'bounce', 'spam']),
+            )
+            .group_by(EmailEvent.email_id, EmailEvent.event_type)
+        ):
+            event_counts[(email_id, event_type)] = n
 
     sent_emails = []
-    for email, recipient_email, recipient_name in sent_emails_data:
-        open_count = db.query(EmailEvent).filter(
-            EmailEvent.email_id == email.id, EmailEvent.event_type == 'open'
-        ).count()
-        click_count = db.query(EmailEvent).filter(
-            EmailEvent.email_id == email.id, EmailEvent.event_type == 'click'
-        ).count()
-        bounce = db.query(EmailEvent).filter(
-            EmailEvent.email_id == email.id, EmailEvent.event_type.in_(['bounce', 'spam'])
-        ).count() > 0
-
-        sent_emails.append(EmailAnalytics(
-            id=email.id,
-            subject=email.subject,
-            recipient_email=recipient_email,
-            recipient_name=recipient_name or "",
-            status=email.status.value,
-            sent_at=email.sent_at,
-            open_count=open_count,
-            click_count=click_count,
-            bounce=bounce,
-        ))
-
-    return CampaignStatusSummary(
-        total_emails=total,
-        sent=sent,
-        delivered=delivered,
-        failed=failed,
-        replied=replied,
-        draft=draft,
-        sent_emails=sent_emails,
-    )
+    for email_id, subject, status, sent_at, recipient_email, recipient_name in sent_emails_data:
+        # Same keys, in the same order, as schemas.EmailAnalytics
+        sent_emails.append({
+            "id": email_id,
+            "subject": subject,
+            "recipient_email": recipient_email,
+            "recipient_name": recipient_name or "",
+            "status": status.value,
+            "sent_at": sent_at,
+            "open_count": event_counts.get((email_id, EventType.open), 0),
+            "click_count": event_counts.get((email_id, EventType.click), 0),
+            "bounce": bool(
+                event_counts.get((email_id, EventType.bounce)) or event_counts.get((email_id, EventType.spam))
+            ),
+        })
+
+    return {
+        "total_emails": total,
+        "sent": status_counts.get(EmailStatus.sent, 0),
+        "delivered": status_counts.get(EmailStatus.delivered, 0),
+        "failed": status_counts.get(EmailStatus.failed, 0),
+        "replied": status_counts.get(EmailStatus.replied, 0),
+        "draft": status_counts.get(EmailStatus.draft, 0),
+        "sent_emails": sent_emails,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("/{campaign_id}/generate-emails", response_model=List[EmailInstanceBase])
@@ -96,12 +226,17 @@ def generate_emails(
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
+    # Only the campaign's own audience, via the campaign_contacts membership table
+    members = db.query(Contact).join(
+        CampaignContact, CampaignContact.contact_id == Contact.id
+    ).filter(CampaignContact.campaign_id == campaign_id)
+
     if payload.contact_ids:
-        contacts = db.query(Contact).filter(Contact.id.in_(payload.contact_ids)).all()
+        contacts = members.filter(Contact.id.in_(payload.contact_ids)).all()
         if not contacts:
             raise HTTPException(status_code=400, detail="No valid contacts found")
     else:
-        contacts = db.query(Contact).all()
+        contacts = members.all()
     steps = (
         db.query(SequenceStep)
         .filter(SequenceStep.campaign_id == campaign_id)
@@ -112,57 +247,81 @@ def generate_emails(
     if not contacts or not steps:
         raise HTTPException(status_code=400, detail="Campaign missing contacts or steps")
 
+    contact_ids = [contact.id for contact in contacts]
+
+    def sequence_emails_by_key(newest_first: bool) -> dict:
+        """(contact_id, step_id) -> email, loaded in one query for all contacts."""
+        query = db.query(EmailInstance).filter(
+            EmailInstance.campaign_id == campaign_id,
+            EmailInstance.is_reply == False,
+        )
+        if payload.contact_ids:
+            query = query.filter(EmailInstance.contact_id.in_(contact_ids))
+        order = EmailInstance.id.desc() if newest_first else EmailInstance.id
+        by_key = {}
+        for email in query.order_by(order):
+            by_key.setdefault((email.contact_id, email.sequence_step_id), email)
+        return by_key
+
+    existing = sequence_emails_by_key(newest_first=False)
+    # Imported here: the langchain stack is only needed when generating
+    from ..services.agent import get_email_agent
+    from ..services.prompt_builder import generation_fingerprint
+
     if payload.regenerate:
-        db.query(EmailInstance).filter(
-            EmailInstance.campaign_id == campaign_id, EmailInstance.is_reply == False
-        ).delete()
-        db.commit()
+        # Redo only unsent drafts whose inputs changed (or all of them with
+        # force); sent, queued and delivered emails are never touched.
+        stale_ids = []
+        for contact in contacts:
+            for step in steps:
+                email = existing.get((contact.id, step.id))
+                if email is None or email.status not in REGENERATE_STATUSES:
+                    continue
+                fingerprint = generation_fingerprint(campaign, contact, step, settings.GROQ_MODEL_NAME)
+                if payload.force or email.input_fingerprint != fingerprint:
+                    stale_ids.append(email.id)
+                    del existing[(contact.id, step.id)]
+        if stale_ids:
+            db.query(EmailInstance).filter(EmailInstance.id.in_(stale_ids)).delete(synchronize_session=False)
+            db.commit()
+            bump_campaign_version(campaign_id)
 
-    email_instances: list[EmailInstance] = []
     agent = get_email_agent()
 
-    # For each (contact, step), check if already exists, if not, generate
+    # For each (contact, step), generate only if it does not exist yet
+    generated = False
     for contact in contacts:
         for step in steps:
-            existing_email = db.query(EmailInstance).filter(
-                EmailInstance.campaign_id == campaign_id,
-                EmailInstance.contact_id == contact.id,
-                EmailInstance.sequence_step_id == step.id,
-                EmailInstance.is_reply == False,
-            ).first()
-
-            if existing_email:
-                email_instances.append(existing_email)
+            if (contact.id, step.id) in existing:
                 continue  # Skip generation if already exists
 
-            state = agent.invoke(
-                {
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": (
-                                "Generate an outreach email for this contact and step. "
-                                f"Use generate_sequence_email_tool with contact_id={contact.id} "
-                                f"and step_id={step.id}. "
-                                "Return the tool result."
-                            ),
-                        }
-                    ]
-                }
-            )
-            # The tool itself already creates the EmailInstance in the DB.
-            # To keep things simple, we just fetch the latest email for this contact+step.
-            latest_email = (
-                db.query(EmailInstance)
-                .filter(
-                    EmailInstance.campaign_id == campaign_id,
-                    EmailInstance.contact_id == contact.id,
-                    EmailInstance.sequence_step_id == step.id,
+            with LLM_CHAIN_SECONDS.time(tool="agent"):
+                state = agent.invoke(
+                    {
+                        "messages": [
+                            {
+                                "role": "user",
+                                "content": (
+                                    "Generate an outreach email for this contact and step. "
+                                    f"Use generate_sequence_email_tool with contact_id={contact.id} "
+                                    f"and step_id={step.id}. "
+                                    "Return the tool result."
+                                ),
+                            }
+                        ]
+                    }
                 )
-                .order_by(EmailInstance.id.desc())
-                .first()
-            )
-            if latest_email:
-                email_instances.append(latest_email)
+            generated = True
+
+    # The tool itself already creates the EmailInstances in the DB; pick up
+    # the latest one per contact+step in a single query.
+    latest = sequence_emails_by_key(newest_first=True) if generated else {}
+    email_instances: list[EmailInstance] = []
+    for contact in contacts:
+        for step in steps:
+            email = existing.get((contact.id, step.id)) or latest.get((contact.id, step.id))
+            if email:
+                email_instances.append(email)
 
+    bump_campaign_version(campaign_id)
     return [EmailInstanceBase.model_validate(e) for e in email_instances]
@@ -1,28 +1,70 @@
 from typing import List
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, select, update
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..models import EmailInstance, EmailStatus, Campaign, SequenceStep
-from ..schemas import EmailInstanceBase, UpdateEmailRequest, SendEmailsRequest
+from ..config import settings
+from ..db import get_db, get_read_db
+from ..deps import PageParams, get_page_params, parse_fields, encode_cursor, NEXT_CURSOR_HEADER
+from ..models import EmailInstance, EmailStatus, Campaign, CampaignContact, Contact, SequenceStep
+from ..responses import FastJSONResponse, rows_as_dicts
+from ..schemas import (
+    BulkUpdateEmailsRequest,
+    BulkUpdateEmailsResponse,
+    EmailInstanceBase,
+    EmailListItem,
+    SendEmailsRequest,
+    UpdateEmailRequest,
+)
 from ..services.email_service import send_email_via_sendgrid
+from ..services.campaign_cache import bump_campaign_version
+from ..services.campaign_events import CampaignDelta, get_event_hub
+from ..services.metrics import EMAILS_SUPPRESSED
+from ..services.suppression import SUPPRESSIONS, split_suppressed
 
 router = APIRouter(prefix="/emails", tags=["emails"])
 
 
-@router.get("/", response_model=List[EmailInstanceBase])
+EMAIL_LIST_COLUMNS = {name: getattr(EmailInstance, name) for name in EmailListItem.model_fields}
+
+# Bulk edits only touch emails that have not gone out, and can only move
+# them between these states.
+EDITABLE_STATUSES = (EmailStatus.draft, EmailStatus.awaiting_review, EmailStatus.queued)
+
+# What POST /emails/send picks up; queued = approved through bulk-update.
+SENDABLE_STATUSES = EDITABLE_STATUSES
+
+
+@router.get("/", response_model=List[EmailListItem], response_model_exclude_unset=True)
 def list_emails(
     campaign_id: int,
+    response: Response,
     status: str | None = Query(None),
-    db: Session = Depends(get_db),
+    fields: str | None = Query(None, description="Comma-separated columns, e.g. id,subject,status"),
+    page: PageParams = Depends(get_page_params),
+    db: Session = Depends(get_read_db),
 ):
-    query = db.query(EmailInstance).filter(EmailInstance.campaign_id == campaign_id)
+    # Newest first; the cursor is the smallest id of the previous page.
+    names = parse_fields(fields, EMAIL_LIST_COLUMNS)
+    query = db.query(*[EMAIL_LIST_COLUMNS[n] for n in names]).filter(
+        EmailInstance.campaign_id == campaign_id
+    )
     if status:
         query = query.filter(EmailInstance.status == EmailStatus(status))
-    emails = query.order_by(EmailInstance.id.desc()).all()
-    return [EmailInstanceBase.model_validate(e) for e in emails]
+    if page.after_id is not None:
+        query = query.filter(EmailInstance.id < page.after_id)
+    rows = query.order_by(EmailInstance.id.desc()).limit(page.limit + 1).all()
+
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    if settings.FAST_JSON_RESPONSES:
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+        return FastJSONResponse(rows_as_dicts(rows, names), headers=headers)
+    return [EmailListItem(**row._mapping) for row in rows]
 
 
 @router.put("/{email_id}", response_model=EmailInstanceBase)
@@ -44,9 +86,65 @@ def update_email(
 
     db.commit()
     db.refresh(email)
+    bump_campaign_version(email.campaign_id)
     return EmailInstanceBase.model_validate(email)
 
 
+@router.post("/bulk-update", response_model=BulkUpdateEmailsResponse)
+def bulk_update_emails(
+    payload: BulkUpdateEmailsRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Patch many drafts at once (e.g. approve a whole step): one set-based
+    UPDATE ... RETURNING instead of a PUT per email.
+    """
+    if not payload.ids and payload.filter is None:
+        raise HTTPException(status_code=400, detail="Provide ids or a filter")
+    values = payload.model_dump(include={"subject", "body_text", "status"}, exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    if payload.status is not None and payload.status not in EDITABLE_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bulk status must be one of: {', '.join(s.value for s in EDITABLE_STATUSES)}",
+        )
+
+    conditions = [EmailInstance.status.in_(EDITABLE_STATUSES)]
+    if payload.ids:
+        conditions.append(EmailInstance.id.in_(payload.ids))
+    f = payload.filter
+    if f is not None:
+        conditions.append(EmailInstance.campaign_id == f.campaign_id)
+        if f.step_number is not None:
+            conditions.append(
+                EmailInstance.sequence_step_id.in_(
+                    select(SequenceStep.id).where(
+                        SequenceStep.campaign_id == f.campaign_id,
+                        SequenceStep.step_number == f.step_number,
+                    )
+                )
+            )
+        if f.status is not None:
+            conditions.append(EmailInstance.status == f.status)
+        if f.is_reply is not None:
+            conditions.append(EmailInstance.is_reply == f.is_reply)
+
+    stmt = (
+        update(EmailInstance)
+        .where(*conditions)
+        .values(**values)
+        .returning(EmailInstance.id, EmailInstance.campaign_id)
+    )
+    rows = db.execute(stmt, execution_options={"synchronize_session": False}).all()
+    db.commit()
+
+    updated_ids = sorted(row.id for row in rows)
+    bump_campaign_version(*{row.campaign_id for row in rows})
+    skipped = sorted(set(payload.ids or ()) - set(updated_ids))
+    return BulkUpdateEmailsResponse(updated=len(updated_ids), ids=updated_ids, skipped_ids=skipped)
+
+
 @router.post("/send", response_model=int)
 def send_emails(
     payload: SendEmailsRequest,
@@ -65,29 +163,49 @@ def send_emails(
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
 
+    # Recipients come through campaign membership; the join also avoids a
+    # lazy email.contact load per email.
     emails = (
-        db.query(EmailInstance)
+        db.query(EmailInstance, Contact.email)
+        .join(
+            CampaignContact,
+            and_(
+                CampaignContact.campaign_id == EmailInstance.campaign_id,
+                CampaignContact.contact_id == EmailInstance.contact_id,
+            ),
+        )
+        .join(Contact, Contact.id == EmailInstance.contact_id)
         .filter(
             EmailInstance.campaign_id == campaign_id,
             EmailInstance.sequence_step_id == step.id,
-            EmailInstance.status.in_([EmailStatus.draft, EmailStatus.awaiting_review]),
+            EmailInstance.status.in_(SENDABLE_STATUSES),
             EmailInstance.is_reply == False,
         )
         .all()
     )
 
+    # Bounced/spam-reporting recipients are skipped (their drafts stay unsent)
+    SUPPRESSIONS.refresh(db)
+    emails, suppressed = split_suppressed(emails)
+    if suppressed:
+        EMAILS_SUPPRESSED.inc(len(suppressed), path="send_emails")
+
+    delta = CampaignDelta()
     sent_count = 0
-    for email in emails:
+    for email, to_email in emails:
         msg_id = send_email_via_sendgrid(
-            to_email=email.contact.email,
+            to_email=to_email,
             subject=email.subject,
             body_text=email.body_text,
             email_instance_id=email.id,
         )
         email.provider_message_id = msg_id
         email.sent_at = datetime.utcnow()
+        delta.move(email.id, email.status, EmailStatus.sent)
         email.status = EmailStatus.sent
         sent_count += 1
 
     db.commit()
+    bump_campaign_version(campaign_id)
+    get_event_hub().publish({campaign_id: delta})
     return sent_count
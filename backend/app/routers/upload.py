@@ -1,12 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
+from collections import Counter
 from typing import List
 
-from ..schemas import UploadContactsResponse, ConfirmContactsRequest, CampaignResponse, ContactPreview
-from ..db import get_db
-from ..models import Campaign, Contact, SequenceStep
-from ..services.contacts_import import parse_contacts_file, confirm_contacts_from_payload
+from ..schemas import UploadContactsResponse, ConfirmContactsRequest, CampaignResponse, ContactListItem
+from ..config import settings
+from ..db import get_async_db, get_read_db
+from ..deps import PageParams, get_page_params, parse_fields, encode_cursor, NEXT_CURSOR_HEADER
+from ..models import Campaign, CampaignContact, Contact, SequenceStep
+from ..responses import FastJSONResponse, rows_as_dicts
 
 from fastapi import Depends
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 router = APIRouter(tags=["upload"])
@@ -16,24 +21,66 @@ router = APIRouter(tags=["upload"])
 async def upload_contacts(
     file: UploadFile = File(...),
 ):
+    # Starlette has already spooled the upload to a temp file; parse it from
+    # there in chunks instead of reading it into memory, staging every row
+    # server-side for /contacts/confirm. pandas parsing is CPU-bound, so keep
+    # it off the event loop. (pandas/pyarrow are imported on first upload,
+    # not at worker startup.)
+    from ..services.import_staging import stage_contacts_upload
+
     try:
-        contents = await file.read()
-        preview_rows = parse_contacts_file(contents, file.filename)
+        preview_rows, stats, staged, expires_at = await run_in_threadpool(
+            stage_contacts_upload, file.file, file.filename
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse file: {e}")
+    finally:
+        await file.close()
 
     inferred_columns = ["email", "first_name", "company", "role", "hobbies", "mbti_type"]
-    return UploadContactsResponse(preview_rows=preview_rows, inferred_columns=inferred_columns)
+    return UploadContactsResponse(
+        preview_rows=preview_rows,
+        inferred_columns=inferred_columns,
+        stats=stats,
+        import_id=staged.import_id,
+        columns=staged.columns,
+        expires_at=expires_at,
+    )
 
 
 @router.post("/contacts/confirm", response_model=CampaignResponse)
 async def confirm_contacts(
     payload: ConfirmContactsRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    rows = confirm_contacts_from_payload(payload.contacts)
-    if not rows:
-        raise HTTPException(status_code=400, detail="No valid contacts")
+    from ..services.contacts_import import (
+        confirm_contacts_from_payload,
+        contact_batches_from_chunks,
+        validate_column_overrides,
+        bulk_upsert_contacts,
+        REJECT_REASONS,
+    )
+    from ..services.import_staging import load_import_meta, iter_staged_chunks, delete_import
+
+    # Staged files are read and cleaned in the threadpool, never on the event loop
+    report: Counter = Counter()
+    if payload.import_id:
+        try:
+            meta = await run_in_threadpool(load_import_meta, payload.import_id)
+        except LookupError:
+            raise HTTPException(status_code=404, detail="Import not found or expired")
+        try:
+            validate_column_overrides(meta["columns"], payload.column_overrides)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        batches = iterate_in_threadpool(
+            contact_batches_from_chunks(iter_staged_chunks(payload.import_id), payload.column_overrides, report)
+        )
+    else:
+        rows = await run_in_threadpool(confirm_contacts_from_payload, payload.contacts, report)
+        if not rows:
+            raise HTTPException(status_code=400, detail="No valid contacts")
+        batches = iterate_in_threadpool(iter([rows]))
 
     campaign = Campaign(
         name=payload.campaign_name,
@@ -41,7 +88,7 @@ async def confirm_contacts(
         product_description=payload.product_description,
     )
     db.add(campaign)
-    db.flush()
+    await db.flush()
 
     # default 3-step sequence
     steps = [
@@ -50,43 +97,53 @@ async def confirm_contacts(
         SequenceStep(campaign_id=campaign.id, step_number=3, offset_days=7, name="Final reminder"),
     ]
     db.add_all(steps)
+    await db.flush()
 
-    contacts = [
-        Contact(
-            email=row["email"],
-            first_name=row.get("first_name"),
-            company=row.get("company"),
-            role=row.get("role"),
-            hobbies=row.get("hobbies"),
-            mbti_type=row.get("mbti_type"),
-        )
-        for row in rows
-    ]
-    db.add_all(contacts)
+    contacts_imported = await bulk_upsert_contacts(db, campaign.id, batches)
+    if not contacts_imported and payload.import_id:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="No valid contacts")
 
-    db.commit()
-    db.refresh(campaign)
+    await db.commit()
+    if payload.import_id:
+        await run_in_threadpool(delete_import, payload.import_id)
 
     return CampaignResponse(
         id=campaign.id,
         name=campaign.name,
         product_name=campaign.product_name or "",
         product_description=campaign.product_description,
+        contacts_imported=contacts_imported,
+        rejected={reason: report[reason] for reason in REJECT_REASONS},
     )
 
 
-@router.get("/contacts", response_model=List[ContactPreview])
-def list_contacts(db: Session = Depends(get_db)):
-    contacts = db.query(Contact).all()
-    return [
-        ContactPreview(
-            id=c.id,
-            email=c.email,
-            first_name=c.first_name,
-            company=c.company,
-            role=c.role,
-            hobbies=c.hobbies,
-            mbti_type=c.mbti_type,
+CONTACT_LIST_COLUMNS = {name: getattr(Contact, name) for name in ContactListItem.model_fields}
+
+
+@router.get("/contacts", response_model=List[ContactListItem], response_model_exclude_unset=True)
+def list_contacts(
+    response: Response,
+    campaign_id: int | None = Query(None, description="Only contacts in this campaign's audience"),
+    fields: str | None = Query(None, description="Comma-separated columns, e.g. id,email,first_name"),
+    page: PageParams = Depends(get_page_params),
+    db: Session = Depends(get_read_db),
+):
+    names = parse_fields(fields, CONTACT_LIST_COLUMNS)
+    query = db.query(*[CONTACT_LIST_COLUMNS[n] for n in names])
+    if campaign_id is not None:
+        query = query.join(CampaignContact, CampaignContact.contact_id == Contact.id).filter(
+            CampaignContact.campaign_id == campaign_id
         )
-        for c in contacts
-    ]
+    if page.after_id is not None:
+        query = query.filter(Contact.id > page.after_id)
+    rows = query.order_by(Contact.id).limit(page.limit + 1).all()
+
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    if settings.FAST_JSON_RESPONSES:
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+        return FastJSONResponse(rows_as_dicts(rows, names), headers=headers)
+    return [ContactListItem(**row._mapping) for row in rows]
@@ -1,95 +1,160 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from ..db import get_db
-from ..models import EmailInstance, EmailEvent, EventType, EmailStatus
+from ..db import get_async_db
+from ..models import Contact, EmailInstance, EmailEvent, EventType, EmailStatus
 from ..schemas import ReplyWebhookPayload
-from ..services.agent import get_email_agent
+from ..services.campaign_cache import bump_campaign_version
+from ..services.campaign_events import CampaignDelta, get_event_hub
+from ..services.metrics import LLM_CHAIN_SECONDS, WEBHOOK_EVENTS
+from ..services.suppression import (
+    SUPPRESSING_EVENTS,
+    SUPPRESSIONS,
+    insert_suppressions_stmt,
+    normalize_email,
+)
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
 
+def _email_instance_id(ev: dict):
+    """The id sent in custom_args; None when missing or malformed, so one bad event cannot fail the batch."""
+    custom_args = ev.get("custom_args") or {}
+    value = ev.get("email_instance_id")
+    if not value and isinstance(custom_args, dict):
+        value = custom_args.get("email_instance_id")
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
 @router.post("/sendgrid-events")
 async def sendgrid_events(
     events: List[dict] = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Map basic SendGrid delivered/bounce/etc. events to EmailEvent.
     You should configure SendGrid Event Webhook to send JSON here.
     """
-    for ev in events:
-        email_instance_id = ev.get("email_instance_id") or ev.get("custom_args", {}).get("email_instance_id")
-        if not email_instance_id:
-            continue
-        email = db.get(EmailInstance, int(email_instance_id))
-        if not email:
-            continue
+    # Load every referenced email in one round trip instead of one per event.
+    ids = {i for i in (_email_instance_id(ev) for ev in events) if i is not None}
+    emails_by_id = {}
+    if ids:
+        result = await db.scalars(select(EmailInstance).where(EmailInstance.id.in_(ids)))
+        emails_by_id = {e.id: e for e in result}
 
-        event_type_str = ev.get("event")
-        if not event_type_str:
-            continue
+    touched_campaigns: set[int] = set()
+    # Status moves and engagement for live viewers (GET /campaigns/{id}/events)
+    events_hub = get_event_hub()
+    deltas: dict[int, CampaignDelta] = {}
+    event_rows: list[dict] = []
+    # Bounces/spam reports: address -> suppressions row (contact lookup if the event has no address)
+    suppress: dict[str, dict] = {}
+    suppress_by_contact: dict[int, dict] = {}
+    for ev in events:
         try:
-            event_type = EventType(event_type_str)
+            event_type = EventType(ev.get("event"))
         except Exception:
+            WEBHOOK_EVENTS.inc(event="unknown", outcome="ignored")
             continue
+        email_instance_id = _email_instance_id(ev)
+        email = emails_by_id.get(email_instance_id) if email_instance_id else None
+        if not email:
+            WEBHOOK_EVENTS.inc(event=event_type.value, outcome="unmatched")
+            continue
+        WEBHOOK_EVENTS.inc(event=event_type.value, outcome="recorded")
 
-        email_event = EmailEvent(
-            email_id=email.id,
-            event_type=event_type,
-            event_metadata=ev,
-        )
-        db.add(email_event)
+        event_rows.append({"email_id": email.id, "event_type": event_type, "event_metadata": ev})
+        touched_campaigns.add(email.campaign_id)
 
+        old_status = email.status
         if event_type == EventType.delivered:
             email.status = EmailStatus.delivered
         elif event_type == EventType.bounce:
             email.status = EmailStatus.failed
         elif event_type == EventType.reply:
             email.status = EmailStatus.replied
+        if events_hub.watching(email.campaign_id):
+            delta = deltas.setdefault(email.campaign_id, CampaignDelta())
+            delta.move(email.id, old_status, email.status)
+            delta.engage(email.id, event_type)
+
+        if event_type in SUPPRESSING_EVENTS:
+            row = {"reason": event_type.value, "email_instance_id": email.id}
+            address = normalize_email(ev.get("email"))
+            if address:
+                suppress.setdefault(address, {"email": address, **row})
+            else:
+                suppress_by_contact.setdefault(email.contact_id, row)
 
-    db.commit()
+    if suppress_by_contact:
+        result = await db.execute(
+            select(Contact.id, Contact.email).where(Contact.id.in_(suppress_by_contact))
+        )
+        for contact_id, address in result:
+            suppress.setdefault(address, {"email": address, **suppress_by_contact[contact_id]})
+
+    if event_rows:
+        # One executemany; ORM adds would INSERT ... RETURNING id row by row
+        await db.execute(insert(EmailEvent), event_rows)
+    if suppress:
+        conn = await db.connection()
+        await db.execute(insert_suppressions_stmt(conn.dialect.name, suppress.values()))
+    await db.commit()
+    bump_campaign_version(*touched_campaigns)
+    events_hub.publish(deltas)
+    for address, row in suppress.items():
+        SUPPRESSIONS.add(address, row["reason"])
     return {"ok": True}
 
 
 @router.post("/reply")
 async def handle_reply(
     payload: ReplyWebhookPayload,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Handle a reply:
     - Use the LangChain agent to classify and draft a reply.
     - Agent decides whether to auto-send (simple query) or just create a draft.
     """
-    original = db.get(EmailInstance, payload.original_email_id)
-    if not original:
+    # Imported here: the langchain stack is only needed for replies
+    from ..services.agent import get_email_agent
+    from ..services.reply_context import load_reply_context, use_reply_context
+
+    # The email, recipient and thread in one query, shared by the agent's tool calls
+    ctx = await db.run_sync(load_reply_context, payload.original_email_id)
+    if ctx is None:
         raise HTTPException(status_code=404, detail="Original email not found")
 
     agent = get_email_agent()
-    state = agent.invoke(
-        {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": (
-                        "We received an email reply.\n"
-                        f"Original email id: {payload.original_email_id}\n"
-                        f"Incoming reply text: {payload.incoming_text}\n"
-                        f"Recipient's email address: {payload.from_email}\n\n"
-                        "1) Call classify_reply_tool to see if the reply is simple.\n"
-                        "2) Call draft_reply_tool to create a reply body.\n"
-                        "3) If classify_reply_tool.is_simple is true, "
-                        "call send_email_tool to send the reply automatically.\n"
-                        "4) Otherwise, only create the draft and do NOT send.\n"
-                        "Return a short summary of what you did."
-                    ),
-                }
-            ]
-        }
-    )
+    with use_reply_context(ctx), LLM_CHAIN_SECONDS.time(tool="agent"):
+        state = await agent.ainvoke(
+            {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": (
+                            "We received an email reply.\n"
+                            f"Original email id: {payload.original_email_id}\n"
+                            f"Incoming reply text: {payload.incoming_text}\n"
+                            f"Recipient's email address: {payload.from_email}\n\n"
+                            "1) Call classify_reply_tool to see if the reply is simple.\n"
+                            "2) Call draft_reply_tool to create a reply body.\n"
+                            "3) If classify_reply_tool.is_simple is true, "
+                            "call send_email_tool to send the reply automatically.\n"
+                            "4) Otherwise, only create the draft and do NOT send.\n"
+                            "Return a short summary of what you did."
+                        ),
+                    }
+                ]
+            }
+        )
 
     final_msg = state["messages"][-1]
     return {"summary": final_msg.content}
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -13,6 +13,17 @@ class ContactPreview(BaseModel):
     role: Optional[str] = None
     hobbies: Optional[str] = None
     mbti_type: Optional[str] = None
+    is_role_account: bool = False
+
+class ContactListItem(BaseModel):
+    # Every column except id is optional so `fields=` projections validate.
+    id: int
+    email: Optional[str] = None
+    first_name: Optional[str] = None
+    company: Optional[str] = None
+    role: Optional[str] = None
+    hobbies: Optional[str] = None
+    mbti_type: Optional[str] = None
 
 class ContactBase(BaseModel):
     id: int
@@ -21,9 +32,24 @@ class ContactBase(BaseModel):
     company: Optional[str] = None
 
 
+class ContactsFileStats(BaseModel):
+    total_rows: int
+    rows_with_email: int
+    rows_missing_email: int
+    # Rows that pass cleaning (valid, de-duplicated email) and would be imported
+    valid_rows: int = 0
+    role_accounts: int = 0
+    rejected: Dict[str, int] = {}
+
+
 class UploadContactsResponse(BaseModel):
     preview_rows: List[ContactPreview]
     inferred_columns: List[str]
+    stats: Optional[ContactsFileStats] = None
+    # Server-side staged copy of the whole file; pass import_id to /contacts/confirm
+    import_id: Optional[str] = None
+    columns: List[str] = []
+    expires_at: Optional[datetime] = None
 
 
 class ConfirmContact(BaseModel):
@@ -39,7 +65,11 @@ class ConfirmContactsRequest(BaseModel):
     campaign_name: str
     product_name: str
     product_description: str
-    contacts: List[ConfirmContact]
+    # Either the contacts themselves, or the import_id from /upload-contacts
+    contacts: List[ConfirmContact] = []
+    import_id: Optional[str] = None
+    # Staged source column -> contact field, e.g. {"Nickname": "first_name"}
+    column_overrides: Dict[str, str] = {}
 
 
 class CampaignResponse(BaseModel):
@@ -47,6 +77,8 @@ class CampaignResponse(BaseModel):
     name: str
     product_name: str
     product_description: Optional[str]
+    contacts_imported: Optional[int] = None
+    rejected: Optional[Dict[str, int]] = None
 
     class Config:
         from_attributes = True
@@ -61,19 +93,62 @@ class EmailInstanceBase(BaseModel):
     body_text: str
     status: EmailStatus
     is_reply: bool
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class EmailListItem(BaseModel):
+    # Same shape as EmailInstanceBase, but projectable via `fields=`.
+    id: int
+    campaign_id: Optional[int] = None
+    contact_id: Optional[int] = None
+    sequence_step_id: Optional[int] = None
+    subject: Optional[str] = None
+    body_text: Optional[str] = None
+    status: Optional[EmailStatus] = None
+    is_reply: Optional[bool] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
 class UpdateEmailRequest(BaseModel):
     subject: Optional[str] = None
     body_text: Optional[str] = None
     status: Optional[EmailStatus] = None
 
 
+class BulkEmailFilter(BaseModel):
+    campaign_id: int
+    step_number: Optional[int] = None
+    status: Optional[EmailStatus] = None
+    is_reply: Optional[bool] = None
+
+
+class BulkUpdateEmailsRequest(BaseModel):
+    # Target rows: explicit ids, a filter, or both (intersection)
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    filter: Optional[BulkEmailFilter] = None
+    # Patch applied to every matched, still-editable email
+    subject: Optional[str] = None
+    body_text: Optional[str] = None
+    status: Optional[EmailStatus] = None
+
+
+class BulkUpdateEmailsResponse(BaseModel):
+    updated: int
+    ids: List[int]
+    # Requested ids that were not updated (missing, or no longer editable)
+    skipped_ids: List[int] = []
+
+
 class GenerateEmailsRequest(BaseModel):
+    # Redo unsent drafts whose inputs (contact, product, template, step,
+    # model) changed since they were generated; force redoes all of them.
     regenerate: bool = False
+    force: bool = False
     contact_ids: Optional[List[int]] = None
 
 
@@ -96,6 +171,7 @@ class CampaignStatusSummary(BaseModel):
     replied: int
     draft: int
     sent_emails: List[EmailAnalytics]
+    next_cursor: Optional[str] = None
 
 
 class SendEmailsRequest(BaseModel):
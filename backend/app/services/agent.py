@@ -4,11 +4,24 @@ from typing import Optional, Dict, Any
 
 from langchain.tools import tool
 from langchain.agents import create_agent
+from langchain.agents.middleware import ModelFallbackMiddleware
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
 from ..config import settings
 from ..db import SessionLocal
+from .campaign_cache import bump_campaign_version
+from .campaign_events import CampaignDelta, get_event_hub
+from .metrics import EMAILS_SUPPRESSED, LLM_CHAIN_SECONDS, LLM_JSON_FALLBACKS, LLM_TEMPLATE_FALLBACKS
+from .llm_client import LLMUnavailable, ResilientLLM
+from .reply_context import current_reply_context, get_reply_context, use_reply_context
+from .suppression import SUPPRESSIONS
+from .prompt_builder import (
+    build_generation_prompt,
+    campaign_product_summary,
+    generation_fingerprint,
+    record_token_usage,
+)
 from ..models import (
     Contact,
     Campaign,
@@ -22,17 +35,26 @@ from ..models import (
 # LLM helper
 # -------------------------------------------------------------------
 
-def _get_llm():
+def _get_llm(model_name: Optional[str] = None, max_retries: int = 0):
     """Central place to construct the Groq-backed chat model."""
+    if not settings.GROQ_API_KEY:
+        raise RuntimeError("GROQ_API_KEY is not set")
     return ChatGroq(
         groq_api_key=settings.GROQ_API_KEY,
-        model=settings.GROQ_MODEL_NAME,
+        model=model_name or settings.GROQ_MODEL_NAME,
         temperature=0.5,
         max_tokens=1500,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        # Retries/hedging for tool calls happen in ResilientLLM
+        max_retries=max_retries,
     )
 
 
-def _parse_json(text: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
+# Tool prompts go through this: deadlines, hedging, fallback model
+_llm = ResilientLLM(_get_llm)
+
+
+def _parse_json(text: str, fallback: Dict[str, Any], tool: str = "unknown") -> Dict[str, Any]:
     """Try to extract JSON from a string; fall back gracefully."""
     try:
         start = text.index("{")
@@ -40,6 +62,7 @@ def _parse_json(text: str, fallback: Dict[str, Any]) -> Dict[str, Any]:
         snippet = text[start:end]
         return json.loads(snippet)
     except Exception:
+        LLM_JSON_FALLBACKS.inc(tool=tool)
         return fallback
 
 
@@ -83,6 +106,9 @@ REPLY_CLASS_PROMPT = ChatPromptTemplate.from_template(
     """
 You are helping decide if an incoming email reply is a simple query that can be safely auto-answered.
 
+Earlier emails we sent in this thread (oldest first):
+{thread_history}
+
 Original email (sent by us):
 {original_email}
 
@@ -107,6 +133,9 @@ REPLY_DRAFT_PROMPT = ChatPromptTemplate.from_template(
     """
 You are writing an email reply on behalf of the user.
 
+Earlier emails we sent in this thread (oldest first):
+{thread_history}
+
 Original email we sent:
 {original_email}
 
@@ -149,44 +178,9 @@ def generate_sequence_email_tool(contact_id: int, step_id: int) -> dict:
         if not campaign:
             return {"error": "Campaign not found"}
 
-        # Build prompt dynamically, incorporating base_prompt_template if available
-        base_prompt_text = campaign.base_prompt_template or """
-You are an email writing assistant helping a single user send a short, professional yet personal sales/marketing email."""
-
-        full_prompt_template = base_prompt_text + """
-
-Product:
-- Name: {product_name}
-- Description: {product_description}
-
-Recipient:
-- First name: {first_name}
-- Company: {company}
-- Role: {role}
-- Hobbies: {hobbies}
-- MBTI personality type: {mbti}
-
-Sequence step: {step_number} ({step_name})
-This is a {step_name} email in a sequence. Tailor the content accordingly - initial outreach might introduce, follow-ups build on previous contact, finals might close or create urgency.
-
-Constraints:
-- Keep body under 180 words.
-- The body must start with "Dear {first_name},".
-- Mention the company and, if relevant, the role.
-- Use a friendly, concise tone.
-- No emojis.
-- Sign off with "Best regards, {sender_first_name}".
-
-Return ONLY a valid JSON object with exactly two string fields:
-- "subject" → the subject line
-- "body" → the email body content only (do not include greeting or sign-off in the JSON body field, as they are fixed)
-
-Do NOT include any explanation, markdown, or backticks. Only the JSON.
-"""
-        dynamic_prompt = ChatPromptTemplate.from_template(full_prompt_template)
-
-        llm_json = _get_llm().bind(response_format={"type": "json_object"})
-        chain = dynamic_prompt | llm_json
+        # Static system prefix (shared by every contact of the campaign) + short per-contact message
+        product_summary = campaign_product_summary(db, campaign, _llm)
+        prompt = build_generation_prompt(campaign, product_summary, contact, step)
         fallback = {
             "subject": f"Hello{ ' ' + contact.first_name if contact.first_name else '' },",
             "body": (
@@ -199,22 +193,25 @@ Do NOT include any explanation, markdown, or backticks. Only the JSON.
             )
         }
 
-        msg = chain.invoke(
-            {
-                "product_name": campaign.product_name,
-                "product_description": campaign.product_description or "",
-                "first_name": contact.first_name or "",
-                "company": contact.company or "",
-                "role": contact.role or "",
-                "hobbies": contact.hobbies or "",
-                "mbti": contact.mbti_type or "",
-                "step_number": step.step_number,
-                "step_name": step.name,
-                "sender_first_name": settings.SENDER_FIRST_NAME,
-            }
-        )
-        raw = msg.content if hasattr(msg, "content") else str(msg)
-        data = _parse_json(raw, fallback)
+        try:
+            with LLM_CHAIN_SECONDS.time(tool="generate_sequence_email"):
+                msg, model_name = _llm.invoke_with_model(prompt.messages, json_mode=True)
+        except LLMUnavailable:
+            LLM_TEMPLATE_FALLBACKS.inc(tool="generate_sequence_email")
+            prompt_tokens = completion_tokens = fingerprint = None
+            data = fallback
+        else:
+            prompt_tokens, completion_tokens = record_token_usage("generate_sequence_email", msg, prompt.messages)
+            raw = msg.content if hasattr(msg, "content") else str(msg)
+            data = _parse_json(raw, fallback, tool="generate_sequence_email")
+            if data is not fallback and data.get("body"):
+                # Drafts from the fallback model get a fingerprint that no longer
+                # matches once the primary is back, so regenerate redoes them
+                fingerprint = generation_fingerprint(campaign, contact, step, model_name)
+            else:
+                # Unusable output: the template draft stays unfingerprinted so
+                # regenerate retries it
+                data, fingerprint = fallback, None
 
         subject = data.get("subject", fallback["subject"])
         # Construct full body with greeting and sign-off, avoiding double greeting or sign-off
@@ -240,6 +237,9 @@ Do NOT include any explanation, markdown, or backticks. Only the JSON.
             body_text=body,
             status=EmailStatus.draft,
             is_reply=False,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            input_fingerprint=fingerprint,
         )
         db.add(email)
         db.commit()
@@ -249,6 +249,8 @@ Do NOT include any explanation, markdown, or backticks. Only the JSON.
             "email_instance_id": email.id,
             "subject": subject,
             "body": body,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
         }
     finally:
         db.close()
@@ -260,28 +262,28 @@ def classify_reply_tool(original_email_id: int, incoming_text: str) -> dict:
     Classify whether a reply is simple enough to auto-respond.
     Returns JSON with keys: is_simple (bool), reason (str).
     """
-    db = SessionLocal()
+    ctx = get_reply_context(original_email_id)
+    if not ctx:
+        return {"error": "Original email not found"}
+
+    messages = REPLY_CLASS_PROMPT.format_messages(
+        thread_history=ctx.history_text(),
+        original_email=ctx.original.body_text,
+        incoming_reply=incoming_text,
+    )
     try:
-        original: Optional[EmailInstance] = db.get(EmailInstance, original_email_id)
-        if not original:
-            return {"error": "Original email not found"}
+        with LLM_CHAIN_SECONDS.time(tool="classify_reply"):
+            msg = _llm.invoke(messages)
+    except LLMUnavailable:
+        # Not simple -> the reply is only drafted, never auto-sent
+        LLM_TEMPLATE_FALLBACKS.inc(tool="classify_reply")
+        return {"is_simple": False, "reason": "Classifier unavailable"}
+    raw = msg.content if hasattr(msg, "content") else str(msg)
+    data = _parse_json(raw, {"is_simple": "no", "reason": "Failed to parse"}, tool="classify_reply")
 
-        llm = _get_llm()
-        chain = REPLY_CLASS_PROMPT | llm
-        msg = chain.invoke(
-            {
-                "original_email": original.body_text,
-                "incoming_reply": incoming_text,
-            }
-        )
-        raw = msg.content if hasattr(msg, "content") else str(msg)
-        data = _parse_json(raw, {"is_simple": "no", "reason": "Failed to parse"})
-
-        is_simple = str(data.get("is_simple", "")).strip().lower() == "yes"
-        reason = data.get("reason", "")
-        return {"is_simple": is_simple, "reason": reason}
-    finally:
-        db.close()
+    is_simple = str(data.get("is_simple", "")).strip().lower() == "yes"
+    reason = data.get("reason", "")
+    return {"is_simple": is_simple, "reason": reason}
 
 
 @tool
@@ -290,39 +292,48 @@ def draft_reply_tool(original_email_id: int, incoming_text: str, goal: str) -> d
     Draft a reply email body for the given original email + incoming reply.
     Returns JSON with keys: body, reply_email_id.
     """
+    ctx = get_reply_context(original_email_id)
+    if not ctx:
+        return {"error": "Original email not found"}
+
     db = SessionLocal()
     try:
-        original: Optional[EmailInstance] = db.get(EmailInstance, original_email_id)
-        if not original:
-            return {"error": "Original email not found"}
-
-        llm = _get_llm()
-        chain = REPLY_DRAFT_PROMPT | llm
-        msg = chain.invoke(
-            {
-                "original_email": original.body_text,
-                "incoming_reply": incoming_text,
-                "goal": goal,
-                "sender_first_name": settings.SENDER_FIRST_NAME,
-            }
+        messages = REPLY_DRAFT_PROMPT.format_messages(
+            thread_history=ctx.history_text(),
+            original_email=ctx.original.body_text,
+            incoming_reply=incoming_text,
+            goal=goal,
+            sender_first_name=settings.SENDER_FIRST_NAME,
         )
-        body = msg.content if hasattr(msg, "content") else str(msg)
+        try:
+            with LLM_CHAIN_SECONDS.time(tool="draft_reply"):
+                msg = _llm.invoke(messages)
+            body = msg.content if hasattr(msg, "content") else str(msg)
+        except LLMUnavailable:
+            # Placeholder draft; it lands in awaiting_review for a human to finish
+            LLM_TEMPLATE_FALLBACKS.inc(tool="draft_reply")
+            body = (
+                "Thanks for your reply. I'll get back to you shortly.\n\n"
+                f"Best regards,\n{settings.SENDER_FIRST_NAME}"
+            )
 
         reply_email = EmailInstance(
-            campaign_id=original.campaign_id,
-            contact_id=original.contact_id,
+            campaign_id=ctx.campaign_id,
+            contact_id=ctx.contact_id,
             sequence_step_id=None,
             is_reply=True,
-            parent_email_id=original.id,
-            subject=f"Re: {original.subject}",
+            parent_email_id=ctx.original.id,
+            subject=f"Re: {ctx.original.subject}",
             body_text=body,
             status=EmailStatus.awaiting_review,
         )
         db.add(reply_email)
+        db.flush()
+        reply_email_id = reply_email.id  # read before commit expires it
         db.commit()
-        db.refresh(reply_email)
+        bump_campaign_version(ctx.campaign_id)
 
-        return {"reply_email_id": reply_email.id, "body": body}
+        return {"reply_email_id": reply_email_id, "body": body}
     finally:
         db.close()
 
@@ -341,21 +352,38 @@ def send_email_tool(email_instance_id: int) -> str:
         if not email:
             return "Email not found."
 
-        contact: Optional[Contact] = db.get(Contact, email.contact_id)
-        if not contact:
-            return "Contact not found."
+        # Replies in a /webhooks/reply run go to the contact already loaded
+        ctx = current_reply_context.get()
+        if ctx is not None and ctx.contact_id == email.contact_id:
+            to_email = ctx.contact_email
+        else:
+            contact: Optional[Contact] = db.get(Contact, email.contact_id)
+            if not contact:
+                return "Contact not found."
+            to_email = contact.email
+
+        SUPPRESSIONS.refresh(db)
+        reason = SUPPRESSIONS.reason(to_email)
+        if reason:
+            EMAILS_SUPPRESSED.inc(path="send_email_tool")
+            return f"Email {email.id} not sent: recipient is suppressed ({reason})."
 
         msg_id = send_email_via_sendgrid(
-            to_email=contact.email,
+            to_email=to_email,
             subject=email.subject,
             body_text=email.body_text,
             email_instance_id=email.id,
         )
         email.provider_message_id = msg_id
         email.sent_at = datetime.utcnow()
+        delta = CampaignDelta()
+        delta.move(email.id, email.status, EmailStatus.sent)
         email.status = EmailStatus.sent
+        email_id, campaign_id = email.id, email.campaign_id
         db.commit()
-        return f"Email {email.id} sent."
+        bump_campaign_version(campaign_id)
+        get_event_hub().publish({campaign_id: delta})
+        return f"Email {email_id} sent."
     finally:
         db.close()
 
@@ -393,11 +421,15 @@ def get_email_agent():
     """
     Construct and return a LangChain agent that knows how to use the tools above.
     """
-    llm = _get_llm()
+    llm = _get_llm(max_retries=1)
+    middleware = []
+    if settings.GROQ_FALLBACK_MODEL_NAME and settings.GROQ_FALLBACK_MODEL_NAME != settings.GROQ_MODEL_NAME:
+        middleware.append(ModelFallbackMiddleware(_get_llm(settings.GROQ_FALLBACK_MODEL_NAME, max_retries=1)))
     agent = create_agent(
         model=llm,
         tools=TOOLS,
         system_prompt=SYSTEM_PROMPT,
+        middleware=middleware,
     )
     return agent
 
@@ -439,27 +471,31 @@ def run_reply_agent(
     """
     Run the reply agent logic; used if you want to trigger it manually.
     """
+    ctx = get_reply_context(original_email_id)
+    if ctx is None:
+        return {"error": "Original email not found"}
     agent = get_email_agent()
-    state = agent.invoke(
-        {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": (
-                        "We received an email reply.\n"
-                        f"Original email id: {original_email_id}\n"
-                        f"Incoming reply text: {incoming_text}\n"
-                        f"Recipient's email address: {recipient_email}\n\n"
-                        "1) Call classify_reply_tool to see if the reply is simple.\n"
-                        "2) Call draft_reply_tool to create a reply body.\n"
-                        "3) If classify_reply_tool.is_simple is true, "
-                        "call send_email_tool to send the reply automatically.\n"
-                        "4) Otherwise, only create the draft and do NOT send.\n"
-                        "Return a short summary of what you did."
-                    ),
-                }
-            ]
-        }
-    )
+    with use_reply_context(ctx):
+        state = agent.invoke(
+            {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": (
+                            "We received an email reply.\n"
+                            f"Original email id: {original_email_id}\n"
+                            f"Incoming reply text: {incoming_text}\n"
+                            f"Recipient's email address: {recipient_email}\n\n"
+                            "1) Call classify_reply_tool to see if the reply is simple.\n"
+                            "2) Call draft_reply_tool to create a reply body.\n"
+                            "3) If classify_reply_tool.is_simple is true, "
+                            "call send_email_tool to send the reply automatically.\n"
+                            "4) Otherwise, only create the draft and do NOT send.\n"
+                            "Return a short summary of what you did."
+                        ),
+                    }
+                ]
+            }
+        )
     final_msg = state["messages"][-1]
     return {"summary": final_msg.content}
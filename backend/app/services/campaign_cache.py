@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from ..config import settings
+
+
+# -------------------------------------------------------------------
+# Campaign summary cache
+#
+# Every campaign has a version counter. Anything that changes what
+# GET /campaigns/{id} would return (webhook events, sends, generation,
+# draft edits) calls bump_campaign_version() after committing. Cached
+# summaries are keyed by version, so a bump invalidates them without
+# having to enumerate keys.
+# -------------------------------------------------------------------
+
+CacheEntry = Tuple[str, bytes]  # (etag, serialized JSON body)
+
+
+class InProcessBackend:
+    """Bounded LRU with TTL; versions live in the same process."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._bumped_at: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def get_version(self, campaign_id: int) -> int:
+        return self._versions.get(campaign_id, 0)
+
+    def bump_version(self, campaign_id: int) -> None:
+        with self._lock:
+            self._versions[campaign_id] = self._versions.get(campaign_id, 0) + 1
+            self._bumped_at[campaign_id] = time.time()
+
+    def get_bumped_at(self, campaign_id: int) -> float:
+        return self._bumped_at.get(campaign_id, 0.0)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Shared across workers; requires the optional `redis` package."""
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def get_version(self, campaign_id: int) -> int:
+        value = self.client.get(f"campaign:{campaign_id}:version")
+        return int(value) if value else 0
+
+    def bump_version(self, campaign_id: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.incr(f"campaign:{campaign_id}:version")
+        pipe.set(f"campaign:{campaign_id}:bumped_at", time.time())
+        pipe.execute()
+
+    def get_bumped_at(self, campaign_id: int) -> float:
+        value = self.client.get(f"campaign:{campaign_id}:bumped_at")
+        return float(value) if value else 0.0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        value = self.client.get(f"campaign-summary:{key}")
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        etag, body = entry
+        self.client.setex(f"campaign-summary:{key}", self.ttl_seconds, etag.encode() + b"\n" + body)
+
+
+_backend = None
+
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        if settings.CACHE_URL:
+            _backend = RedisBackend(settings.CACHE_URL, settings.SUMMARY_CACHE_TTL_SECONDS)
+        else:
+            _backend = InProcessBackend(settings.SUMMARY_CACHE_SIZE, settings.SUMMARY_CACHE_TTL_SECONDS)
+    return _backend
+
+
+def bump_campaign_version(*campaign_ids: int) -> None:
+    backend = get_cache_backend()
+    for campaign_id in set(campaign_ids):
+        backend.bump_version(campaign_id)
+
+
+def bumped_within(campaign_id: int, seconds: float) -> bool:
+    """Whether the campaign changed in the last `seconds` (a replica may not have it yet)."""
+    return time.time() - get_cache_backend().get_bumped_at(campaign_id) < seconds
+
+
+def summary_cache_key(campaign_id: int, *parts) -> str:
+    version = get_cache_backend().get_version(campaign_id)
+    return ":".join(str(p) for p in (campaign_id, version, *parts))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
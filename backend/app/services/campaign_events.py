@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Set
+
+from ..config import settings
+from ..models import EmailStatus, EventType
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# Live campaign status (GET /campaigns/{id}/events, server-sent events)
+#
+# Webhook ingestion and the send paths describe what they changed as a
+# CampaignDelta and publish it after committing:
+#   {"status": {"draft": -3, "sent": 3},
+#    "emails": {"17": {"status": "sent"}, "18": {"open_count": 2}}}
+# status values and *_count values are increments; "bounce" is a flag.
+# A delta is serialized once per batch and handed to each subscriber's
+# bounded queue, so a stream costs O(events), not a summary recompute per
+# viewer. The number of subscribers per worker is capped, and a subscriber
+# that falls behind gets a `resync` event and is dropped (the client
+# refetches GET /campaigns/{id} and reconnects). With CACHE_URL set, deltas
+# go through Redis pub/sub so viewers on any worker see every worker's events.
+# -------------------------------------------------------------------
+
+def format_sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class CampaignDelta:
+    def __init__(self):
+        self.status: Counter = Counter()
+        self.emails: Dict[int, dict] = defaultdict(dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.emails) or any(self.status.values())
+
+    def move(self, email_id: int, old: Optional[EmailStatus], new: EmailStatus) -> None:
+        if old == new:
+            return
+        if old is not None:
+            self.status[old.value] -= 1
+        self.status[new.value] += 1
+        self.emails[email_id]["status"] = new.value
+
+    def engage(self, email_id: int, event_type: EventType) -> None:
+        if event_type == EventType.open:
+            self._incr(email_id, "open_count")
+        elif event_type == EventType.click:
+            self._incr(email_id, "click_count")
+        elif event_type in (EventType.bounce, EventType.spam):
+            self.emails[email_id]["bounce"] = True
+
+    def _incr(self, email_id: int, key: str) -> None:
+        entry = self.emails[email_id]
+        entry[key] = entry.get(key, 0) + 1
+
+    def as_dict(self) -> dict:
+        data = {"status": {k: v for k, v in self.status.items() if v}}
+        if len(self.emails) > settings.SSE_MAX_EMAIL_DELTAS:
+            # Too many rows to patch one by one: counts only, client refetches the list
+            data["emails_truncated"] = True
+        else:
+            data["emails"] = {str(k): v for k, v in self.emails.items()}
+        return data
+
+
+class Subscriber:
+    def __init__(self, campaign_id: int, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.campaign_id = campaign_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def offer(self, payload: bytes) -> None:
+        """Runs on the subscriber's loop."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # The queue is non-empty, so the stream wakes and sees the flag
+            self.overflowed = True
+
+
+class CampaignEventHub:
+    def __init__(self, max_subscribers: int, queue_size: int):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._relay: Optional["RedisRelay"] = None
+        if settings.CACHE_URL:
+            self._relay = RedisRelay(settings.CACHE_URL, self)
+
+    def subscribe(self, campaign_id: int) -> Optional[Subscriber]:
+        """A new subscriber, or None when this worker is at its cap."""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            sub = Subscriber(campaign_id, asyncio.get_running_loop(), self.queue_size)
+            self._subscribers[campaign_id].add(sub)
+            self._count += 1
+        if self._relay is not None:
+            self._relay.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.campaign_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[sub.campaign_id]
+
+    def watching(self, campaign_id: int) -> bool:
+        """Whether deltas for this campaign can reach anyone (publishers skip the work otherwise)."""
+        return self._relay is not None or campaign_id in self._subscribers
+
+    def publish(self, deltas: Dict[int, CampaignDelta]) -> None:
+        for campaign_id, delta in deltas.items():
+            if not delta:
+                continue
+            payload = format_sse("delta", delta.as_dict())
+            if self._relay is not None:
+                self._relay.publish(campaign_id, payload)
+            else:
+                self.dispatch(campaign_id, payload)
+
+    def dispatch(self, campaign_id: int, payload: bytes) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(campaign_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, payload)
+            except RuntimeError:  # loop closed under us
+                self.unsubscribe(sub)
+
+
+class RedisRelay:
+    """Fans deltas out across workers; requires the optional `redis` package."""
+
+    CHANNEL_PREFIX = "campaign-events:"
+
+    def __init__(self, url: str, hub: CampaignEventHub):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.hub = hub
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def publish(self, campaign_id: int, payload: bytes) -> None:
+        try:
+            self.client.publish(f"{self.CHANNEL_PREFIX}{campaign_id}", payload)
+        except Exception:
+            logger.exception("publishing campaign %s delta to redis failed", campaign_id)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="campaign-events", daemon=True)
+                self._thread.start()
+
+    def _listen(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+        for message in pubsub.listen():
+            channel = message["channel"].decode()
+            self.hub.dispatch(int(channel[len(self.CHANNEL_PREFIX):]), message["data"])
+
+
+_hub: Optional[CampaignEventHub] = None
+
+
+def get_event_hub() -> CampaignEventHub:
+    global _hub
+    if _hub is None:
+        _hub = CampaignEventHub(settings.SSE_MAX_SUBSCRIBERS, settings.SSE_QUEUE_SIZE)
+    return _hub
+
+
+async def campaign_event_stream(hub: CampaignEventHub, sub: Subscriber, snapshot: dict, is_disconnected):
+    """SSE body: a snapshot of the counts, then deltas, with heartbeats while idle."""
+    try:
+        yield format_sse("snapshot", snapshot)
+        while True:
+            try:
+                payload = await asyncio.wait_for(sub.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield b": ping\n\n"
+                continue
+            if sub.overflowed:
+                yield format_sse("resync", {})
+                return
+            yield payload
+    finally:
+        hub.unsubscribe(sub)
@@ -0,0 +1,193 @@
+import csv
+import io
+from typing import Callable, Iterator, List
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Contact, EmailEvent, EmailInstance, EventType, SequenceStep
+from .metrics import EXPORT_ROWS
+
+
+# -------------------------------------------------------------------
+# Campaign results export (GET /campaigns/{id}/export)
+#
+# One statement (emails + contacts + per-email event counts) read through a
+# server-side cursor in EXPORT_CHUNK_ROWS batches; each batch is encoded and
+# yielded before the next is fetched, so memory stays flat however large the
+# campaign is. The route hands the generator to a StreamingResponse, which
+# iterates it in the threadpool, off the event loop.
+# -------------------------------------------------------------------
+
+# (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+EXPORT_COLUMNS = [
+    "email_id",
+    "step_number",
+    "is_reply",
+    "status",
+    "subject",
+    "sent_at",
+    "contact_email",
+    "first_name",
+    "company",
+    "role",
+    "open_count",
+    "click_count",
+    "bounce",
+]
+
+
+def _count(event_type: EventType):
+    return func.sum(case((EmailEvent.event_type == event_type, 1), else_=0))
+
+
+def export_query(campaign_id: int):
+    # Event counts for the whole campaign in one grouped pass, joined per email
+    events = (
+        select(
+            EmailEvent.email_id,
+            _count(EventType.open).label("open_count"),
+            _count(EventType.click).label("click_count"),
+            func.sum(case((EmailEvent.event_type.in_([EventType.bounce, EventType.spam]), 1), else_=0)).label(
+                "bounce_count"
+            ),
+        )
+        .join(EmailInstance, EmailInstance.id == EmailEvent.email_id)
+        .where(EmailInstance.campaign_id == campaign_id)
+        .group_by(EmailEvent.email_id)
+        .subquery()
+    )
+    return (
+        select(
+            EmailInstance.id,
+            SequenceStep.step_number,
+            EmailInstance.is_reply,
+            EmailInstance.status,
+            EmailInstance.subject,
+            EmailInstance.sent_at,
+            Contact.email,
+            Contact.first_name,
+            Contact.company,
+            Contact.role,
+            func.coalesce(events.c.open_count, 0),
+            func.coalesce(events.c.click_count, 0),
+            func.coalesce(events.c.bounce_count, 0) > 0,
+        )
+        .join(Contact, Contact.id == EmailInstance.contact_id)
+        .outerjoin(SequenceStep, SequenceStep.id == EmailInstance.sequence_step_id)
+        .outerjoin(events, events.c.email_id == EmailInstance.id)
+        .where(EmailInstance.campaign_id == campaign_id)
+        .order_by(EmailInstance.id)
+    )
+
+
+def iter_export_chunks(db: Session, campaign_id: int) -> Iterator[List[tuple]]:
+    """Export rows in batches; stream_results keeps them in a server-side cursor."""
+    result = db.execute(
+        export_query(campaign_id).execution_options(stream_results=True, yield_per=settings.EXPORT_CHUNK_ROWS)
+    )
+    for partition in result.partitions():
+        yield [(r[0], r[1], bool(r[2]), r[3].value, *r[4:12], bool(r[12])) for r in partition]
+
+
+def _csv_chunks(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        EXPORT_ROWS.inc(len(rows), format="csv")
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only (no rows)
+        yield buffer.getvalue().encode()
+
+
+class _ByteSink:
+    """Write-only file object for ParquetWriter; drain() hands over what was written so far."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _parquet_chunks(chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    # Imported here: pyarrow is slow to import and only needed for this format
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("email_id", pa.int64()),
+            ("step_number", pa.int32()),
+            ("is_reply", pa.bool_()),
+            ("status", pa.string()),
+            ("subject", pa.string()),
+            ("sent_at", pa.timestamp("us")),
+            ("contact_email", pa.string()),
+            ("first_name", pa.string()),
+            ("company", pa.string()),
+            ("role", pa.string()),
+            ("open_count", pa.int64()),
+            ("click_count", pa.int64()),
+            ("bounce", pa.bool_()),
+        ]
+    )
+    sink = _ByteSink()
+    # One row group per fetched chunk
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = [pa.array(values, field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            EXPORT_ROWS.inc(len(rows), format="parquet")
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {"csv": _csv_chunks, "parquet": _parquet_chunks}
+
+
+def stream_campaign_export(session_factory: Callable[[], Session], campaign_id: int, fmt: str) -> Iterator[bytes]:
+    """Response body for the export; owns its session for as long as the client reads."""
+    db = session_factory()
+    try:
+        yield from _ENCODERS[fmt](iter_export_chunks(db, campaign_id))
+    finally:
+        db.close()
+
+
+def export_filename(campaign_id: int, fmt: str) -> str:
+    return f"campaign-{campaign_id}-emails.{EXPORT_FORMATS[fmt][1]}"
@@ -1,26 +1,50 @@
-from io import BytesIO
-from typing import List, Dict
+import re
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterable, BinaryIO, Callable, List, Dict, Iterable, Iterator, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..schemas import ContactPreview, ConfirmContact
+from ..models import Contact, CampaignContact
+from ..schemas import ContactPreview, ConfirmContact, ContactsFileStats
+from .spreadsheet_engines import read_chunks
 
 
 REQUIRED_COLUMN = "email"
 
+# Rows per DataFrame when streaming an uploaded file; bounds peak memory.
+CHUNK_ROWS = 50_000
+PREVIEW_ROWS = 20
 
-def parse_contacts_file(file_bytes: bytes, filename: str) -> List[ContactPreview]:
-    buffer = BytesIO(file_bytes)
-    if filename.lower().endswith(".csv"):
-        df = pd.read_csv(buffer)
-    else:
-        df = pd.read_excel(buffer)
+CONTACT_COLUMNS = ("email", "first_name", "company", "role", "hobbies", "mbti_type")
 
-    df_cols = [c.strip().lower() for c in df.columns]
+# Pragmatic address syntax check (applied to lowercased, trimmed emails).
+EMAIL_RE = re.compile(
+    r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}"
+)
 
+# Shared mailboxes rather than people; kept, but flagged in the preview and stats.
+ROLE_ACCOUNTS = frozenset({
+    "admin", "billing", "contact", "enquiries", "hello", "help", "hr", "info",
+    "jobs", "marketing", "no-reply", "noreply", "office", "postmaster", "press",
+    "sales", "support", "team", "webmaster",
+})
+
+REJECT_REASONS = ("missing_email", "invalid_email", "duplicate_email")
+
+# Rows per upsert statement on SQLite (dev), which has no COPY.
+INSERT_BATCH_SIZE = 5000
+
+
+def _rename_columns(df: pd.DataFrame) -> pd.DataFrame:
     rename_map = {}
     for col in df.columns:
-        low = col.strip().lower()
+        low = str(col).strip().lower()
         if low in ["email", "email address"]:
             rename_map[col] = "email"
         elif low in ["first name", "firstname", "fname", "name"]:
@@ -35,39 +59,265 @@ def parse_contacts_file(file_bytes: bytes, filename: str) -> List[ContactPreview
             rename_map[col] = "mbti_type"
 
     df = df.rename(columns=rename_map)
+    # e.g. both "Name" and "First Name" present: keep the first one
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def iter_contact_chunks(
+    source: BinaryIO,
+    filename: str,
+    chunksize: int = CHUNK_ROWS,
+    engine: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the file as DataFrames of about `chunksize` rows with canonical
+    column names, so memory stays bounded regardless of file size. `engine`
+    overrides the reader picked by spreadsheet_engines.select_engine().
+    The header is checked even when the file has no rows.
+    """
+    chunks = read_chunks(source, filename, chunksize, engine)
+
+    i = -1
+    for i, chunk in enumerate(chunks):
+        chunk = _rename_columns(chunk)
+        if i == 0 and "email" not in chunk.columns:
+            raise ValueError(f"Columns found: {sorted(chunk.columns.tolist())}. One must be renamed to 'email' (case-insensitive variants include: 'email address', 'email', 'mail', etc.).")
+        yield chunk
+    if i < 0:
+        raise ValueError("The file is empty")
+
+
+def clean_contacts_frame(
+    df: pd.DataFrame,
+    seen: Optional[Set[str]] = None,
+    report: Optional[Counter] = None,
+) -> pd.DataFrame:
+    """
+    Vectorized cleaning of one chunk: trim every contact column (blank -> NA),
+    lowercase emails, drop rows whose email is missing, malformed or already
+    seen, and flag role accounts (info@, sales@, ...). `seen` carries emails
+    across chunks for file-wide dedup; `report` accumulates per-reason counts.
+    """
+    out = df.reindex(columns=list(CONTACT_COLUMNS)).astype("string")
+    for col in CONTACT_COLUMNS:
+        out[col] = out[col].str.strip().replace("", pd.NA)
+    email = out["email"].str.lower()
+    out["email"] = email
+
+    missing = email.isna()
+    invalid = ~missing & ~email.str.fullmatch(EMAIL_RE).fillna(False).astype(bool)
+    valid = ~missing & ~invalid
+    duplicate = valid & email.duplicated(keep="first")
+    if seen:
+        # Plain set lookups: Series.isin would rebuild a table from `seen` on every chunk.
+        values = email.to_numpy(dtype=object, na_value=None)
+        in_seen = np.fromiter((v in seen for v in values), dtype=bool, count=len(values))
+        duplicate |= valid & in_seen
 
-    if "email" not in df.columns:
-        raise ValueError(f"Columns found: {sorted(df.columns.tolist())}. One must be renamed to 'email' (case-insensitive variants include: 'email address', 'email', 'mail', etc.).")
+    out = out[valid & ~duplicate]
+    out["is_role_account"] = out["email"].str.split("@").str[0].isin(ROLE_ACCOUNTS).astype(bool)
 
+    if seen is not None:
+        seen.update(out["email"].tolist())
+    if report is not None:
+        report["missing_email"] += int(missing.sum())
+        report["invalid_email"] += int(invalid.sum())
+        report["duplicate_email"] += int(duplicate.sum())
+        report["role_account"] += int(out["is_role_account"].sum())
+    return out
+
+
+def _frame_records(df: pd.DataFrame) -> Iterator[Dict]:
+    """Rows as dicts with NA coerced to None, without per-row pandas overhead."""
+    columns = list(df.columns)
+    arrays = [df[c].to_numpy(dtype=object, na_value=None) for c in columns]
+    for values in zip(*arrays):
+        yield dict(zip(columns, values))
+
+
+def _stats_from_report(total_rows: int, valid_rows: int, report: Counter) -> ContactsFileStats:
+    return ContactsFileStats(
+        total_rows=total_rows,
+        rows_with_email=total_rows - report["missing_email"],
+        rows_missing_email=report["missing_email"],
+        valid_rows=valid_rows,
+        role_accounts=report["role_account"],
+        rejected={reason: report[reason] for reason in REJECT_REASONS},
+    )
+
+
+def parse_contacts_file(
+    source: BinaryIO,
+    filename: str,
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+    engine: Optional[str] = None,
+) -> Tuple[List[ContactPreview], ContactsFileStats]:
+    """
+    Preview rows are the first cleaned rows; stats and the rejection report
+    are accumulated chunk by chunk over the whole file. `on_chunk` sees every
+    raw chunk (used to stage the import server-side). Raises ValueError when
+    no row has a valid email.
+    """
     preview_rows: List[ContactPreview] = []
-    for _, row in df.head(20).iterrows():
-        preview_rows.append(
-            ContactPreview(
-                email=str(row.get("email", "")).strip(),
-                first_name=row.get("first_name"),
-                company=row.get("company"),
-                role=row.get("role"),
-                hobbies=row.get("hobbies"),
-                mbti_type=row.get("mbti_type"),
-            )
-        )
+    total_rows = 0
+    valid_rows = 0
+    seen: Set[str] = set()
+    report: Counter = Counter()
+
+    for chunk in iter_contact_chunks(source, filename, engine=engine):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        total_rows += len(chunk)
+        clean = clean_contacts_frame(chunk, seen, report)
+        valid_rows += len(clean)
 
-    return preview_rows
+        if len(preview_rows) < PREVIEW_ROWS:
+            for row in _frame_records(clean.head(PREVIEW_ROWS - len(preview_rows))):
+                preview_rows.append(ContactPreview(**row))
 
+    if not valid_rows:
+        raise ValueError(f"No valid contacts in {total_rows} rows")
+    return preview_rows, _stats_from_report(total_rows, valid_rows, report)
 
-def confirm_contacts_from_payload(contacts: List[ConfirmContact]) -> List[Dict]:
-    rows: List[Dict] = []
-    for c in contacts:
-        if not c.email:
+
+def confirm_contacts_from_payload(
+    contacts: List[ConfirmContact], report: Optional[Counter] = None
+) -> List[Dict]:
+    if not contacts:
+        return []
+    df = pd.DataFrame([c.model_dump() for c in contacts])
+    clean = clean_contacts_frame(df, report=report)
+    return list(_frame_records(clean[list(CONTACT_COLUMNS)]))
+
+
+def apply_column_overrides(df: pd.DataFrame, overrides: Dict[str, str]) -> pd.DataFrame:
+    """Map source columns onto contact fields, replacing any auto-detected column."""
+    for source, target in overrides.items():
+        if source == target:
             continue
-        rows.append(
-            {
-                "email": c.email,
-                "first_name": c.first_name,
-                "company": c.company,
-                "role": c.role,
-                "hobbies": c.hobbies,
-                "mbti_type": c.mbti_type,
-            }
+        if target in df.columns:
+            df = df.drop(columns=[target])
+        df = df.rename(columns={source: target})
+    return df
+
+
+def validate_column_overrides(columns: List[str], overrides: Dict[str, str]) -> None:
+    unknown = sorted(set(overrides) - set(columns))
+    if unknown:
+        raise ValueError(f"Unknown source columns: {unknown}. Available: {columns}")
+    bad_targets = sorted(set(overrides.values()) - set(CONTACT_COLUMNS))
+    if bad_targets:
+        raise ValueError(f"Unknown contact fields: {bad_targets}. Allowed: {list(CONTACT_COLUMNS)}")
+
+
+def contact_batches_from_chunks(
+    chunks: Iterable[pd.DataFrame],
+    overrides: Optional[Dict[str, str]] = None,
+    report: Optional[Counter] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Turn staged chunks into cleaned contact rows for bulk_upsert_contacts,
+    one list per chunk. Parquet reads and pandas cleaning are CPU-bound:
+    async callers iterate this in the threadpool (iterate_in_threadpool),
+    one hop per chunk.
+    """
+    seen: Set[str] = set()
+    for chunk in chunks:
+        if overrides:
+            chunk = apply_column_overrides(chunk, overrides)
+        clean = clean_contacts_frame(chunk, seen, report)
+        yield list(_frame_records(clean[list(CONTACT_COLUMNS)]))
+
+
+# Contacts are shared across campaigns and unique on email. New values win,
+# but a missing (NULL) column never erases what we already know.
+_PG_UPSERT_FROM_STAGING = """
+WITH upserted AS (
+    INSERT INTO contacts (email, first_name, company, role, hobbies, mbti_type, created_at)
+    SELECT DISTINCT ON (email) email, first_name, company, role, hobbies, mbti_type, %(created_at)s
+    FROM contacts_staging
+    ORDER BY email, ord
+    ON CONFLICT (email) DO UPDATE SET
+        first_name = COALESCE(EXCLUDED.first_name, contacts.first_name),
+        company = COALESCE(EXCLUDED.company, contacts.company),
+        role = COALESCE(EXCLUDED.role, contacts.role),
+        hobbies = COALESCE(EXCLUDED.hobbies, contacts.hobbies),
+        mbti_type = COALESCE(EXCLUDED.mbti_type, contacts.mbti_type)
+    RETURNING id
+)
+INSERT INTO campaign_contacts (campaign_id, contact_id, created_at)
+SELECT %(campaign_id)s, id, %(created_at)s FROM upserted
+ON CONFLICT DO NOTHING
+"""
+
+
+async def bulk_upsert_contacts(db: AsyncSession, campaign_id: int, batches: AsyncIterable[List[Dict]]) -> int:
+    """
+    Upsert batches of contact rows (deduplicated on email) and link them to the campaign,
+    without building ORM objects. Returns how many contacts were added to the
+    campaign. Uses COPY into a staging table on PostgreSQL and batched
+    executemany on SQLite (dev); either way only one batch is held at a time.
+    Runs on the session's connection, so it commits or rolls back with the
+    session.
+    """
+    created_at = datetime.utcnow()
+    conn = await db.connection()
+
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        columns = ", ".join(CONTACT_COLUMNS)
+        async with raw.driver_connection.cursor() as cur:
+            await cur.execute(
+                "CREATE TEMP TABLE contacts_staging (ord bigint, email text, first_name text, "
+                "company text, role text, hobbies text, mbti_type text) ON COMMIT DROP"
+            )
+            async with cur.copy(f"COPY contacts_staging (ord, {columns}) FROM STDIN") as copy:
+                ord_ = 0
+                async for rows in batches:
+                    for row in rows:
+                        await copy.write_row([ord_] + [row.get(c) for c in CONTACT_COLUMNS])
+                        ord_ += 1
+            await cur.execute(
+                _PG_UPSERT_FROM_STAGING, {"campaign_id": campaign_id, "created_at": created_at}
+            )
+            return cur.rowcount
+
+    if conn.dialect.name != "sqlite":
+        raise NotImplementedError(f"Contact import supports PostgreSQL and SQLite, not {conn.dialect.name}")
+
+    # Each batch is written as it arrives; only the emails seen so far are
+    # kept, so the first occurrence in the file wins, as with DISTINCT ON above.
+    seen: Set[str] = set()
+    linked = 0
+    async for rows in batches:
+        items = []
+        for row in rows:
+            if row["email"] not in seen:
+                seen.add(row["email"])
+                items.append(row)
+        for start in range(0, len(items), INSERT_BATCH_SIZE):
+            linked += await _sqlite_upsert_batch(conn, campaign_id, items[start:start + INSERT_BATCH_SIZE], created_at)
+    return linked
+
+
+async def _sqlite_upsert_batch(conn, campaign_id: int, rows: List[Dict], created_at: datetime) -> int:
+    contacts = Contact.__table__
+    batch = [{**{c: row.get(c) for c in CONTACT_COLUMNS}, "created_at": created_at} for row in rows]
+    upsert = sqlite_insert(contacts)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["email"],
+        set_={c: func.coalesce(upsert.excluded[c], contacts.c[c]) for c in CONTACT_COLUMNS[1:]},
+    )
+    await conn.execute(upsert, batch)
+
+    ids = (
+        await conn.execute(
+            select(contacts.c.id).where(contacts.c.email.in_([b["email"] for b in batch]))
         )
-    return rows
+    ).scalars().all()
+    link = sqlite_insert(CampaignContact.__table__).on_conflict_do_nothing()
+    result = await conn.execute(
+        link,
+        [{"campaign_id": campaign_id, "contact_id": i, "created_at": created_at} for i in ids],
+    )
+    return result.rowcount
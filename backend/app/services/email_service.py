@@ -1,11 +1,21 @@
 from typing import Optional
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, CustomArg  # 👈 add CustomArg here
-
 from ..config import settings
+from .metrics import SENDGRID_RESPONSES, SENDGRID_SEND_SECONDS
+
+_sg_client = None
+
 
-sg_client = SendGridAPIClient(settings.SENDGRID_API_KEY)
+def get_sendgrid_client():
+    """Built on first send, so importing the app needs neither the SDK nor a key."""
+    global _sg_client
+    if _sg_client is None:
+        if not settings.SENDGRID_API_KEY:
+            raise RuntimeError("SENDGRID_API_KEY is not set")
+        from sendgrid import SendGridAPIClient
+
+        _sg_client = SendGridAPIClient(settings.SENDGRID_API_KEY)
+    return _sg_client
 
 
 def send_email_via_sendgrid(
@@ -14,6 +24,10 @@ def send_email_via_sendgrid(
     body_text: str,
     email_instance_id: int,
 ) -> Optional[str]:
+    from sendgrid.helpers.mail import Mail, CustomArg
+
+    if not settings.SENDGRID_FROM_EMAIL:
+        raise RuntimeError("SENDGRID_FROM_EMAIL is not set")
     message = Mail(
         from_email=settings.SENDGRID_FROM_EMAIL,
         to_emails=to_email,
@@ -28,7 +42,15 @@ def send_email_via_sendgrid(
         # If anything goes wrong with custom args, just skip them
         pass
 
-    response = sg_client.send(message)
+    sg_client = get_sendgrid_client()
+    try:
+        with SENDGRID_SEND_SECONDS.time():
+            response = sg_client.send(message)
+    except Exception as exc:
+        # python_http_client.HTTPError carries the status; network errors do not
+        SENDGRID_RESPONSES.inc(status=str(getattr(exc, "status_code", "error")))
+        raise
+    SENDGRID_RESPONSES.inc(status=str(response.status_code))
     msg_id = (
         response.headers.get("X-Message-Id")
         or response.headers.get("X-Message-ID")
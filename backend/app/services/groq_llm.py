@@ -1,12 +1,14 @@
-from langchain_groq import ChatGroq
-
 from ..config import settings
 
 
 def get_groq_llm():
+    from langchain_groq import ChatGroq
+
     return ChatGroq(
         groq_api_key=settings.GROQ_API_KEY,
         model_name=settings.GROQ_MODEL_NAME,
         temperature=0.7,
         max_tokens=512,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=1,
     )
@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..config import settings
+from ..schemas import ContactsFileStats
+from .contacts_import import CHUNK_ROWS, parse_contacts_file
+
+
+# -------------------------------------------------------------------
+# Server-side import sessions
+#
+# upload-contacts parses the whole file once and stages it as Parquet
+# under an import id; /contacts/confirm then loads from the staged file
+# instead of the browser posting every contact back as JSON. Staged
+# files live on local disk, so every worker must share IMPORT_STAGING_DIR.
+# -------------------------------------------------------------------
+
+_IMPORT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _staging_dir() -> str:
+    path = settings.IMPORT_STAGING_DIR or os.path.join(tempfile.gettempdir(), "email_app_imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(import_id: str):
+    if not _IMPORT_ID_RE.match(import_id):
+        raise LookupError(import_id)
+    base = os.path.join(_staging_dir(), import_id)
+    return base + ".parquet", base + ".json"
+
+
+class StagedImportWriter:
+    """Appends DataFrame chunks to a Parquet file, all columns as strings."""
+
+    def __init__(self, filename: str):
+        self.import_id = uuid.uuid4().hex
+        self.filename = filename
+        self.columns: List[str] = []
+        self._data_path, self._meta_path = _paths(self.import_id)
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._schema: Optional[pa.Schema] = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self._writer is None:
+            self.columns = [str(c) for c in chunk.columns]
+            self._schema = pa.schema([(c, pa.string()) for c in self.columns])
+            self._writer = pq.ParquetWriter(self._data_path, self._schema)
+        frame = chunk.astype("string")
+        frame.columns = self.columns
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+
+    def commit(self, stats: ContactsFileStats) -> datetime:
+        if self._writer is not None:
+            self._writer.close()
+        expires_ts = time.time() + settings.IMPORT_TTL_SECONDS
+        meta = {
+            "filename": self.filename,
+            "columns": self.columns,
+            "stats": stats.model_dump(),
+            "expires_at": expires_ts,
+        }
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return datetime.utcfromtimestamp(expires_ts)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        for path in (self._data_path, self._meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def stage_contacts_upload(source: BinaryIO, filename: str):
+    """
+    Parse an uploaded file once: build the preview/stats and stage every row.
+    Returns (preview_rows, stats, writer, expires_at).
+    """
+    purge_expired_imports()
+    writer = StagedImportWriter(filename)
+    try:
+        preview_rows, stats = parse_contacts_file(source, filename, on_chunk=writer.write)
+        expires_at = writer.commit(stats)
+    except Exception:
+        writer.abort()
+        raise
+    return preview_rows, stats, writer, expires_at
+
+
+def load_import_meta(import_id: str) -> Dict:
+    """Raises LookupError if the import does not exist or has expired."""
+    _, meta_path = _paths(import_id)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise LookupError(import_id)
+    if meta["expires_at"] < time.time():
+        delete_import(import_id)
+        raise LookupError(import_id)
+    return meta
+
+
+def iter_staged_chunks(import_id: str) -> Iterator[pd.DataFrame]:
+    data_path, _ = _paths(import_id)
+    if not os.path.exists(data_path):
+        return  # file had a header but no rows
+    for batch in pq.ParquetFile(data_path).iter_batches(batch_size=CHUNK_ROWS):
+        yield batch.to_pandas()
+
+
+def delete_import(import_id: str) -> None:
+    for path in _paths(import_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def purge_expired_imports() -> None:
+    now = time.time()
+    directory = _staging_dir()
+    for name in os.listdir(directory):
+        import_id, ext = os.path.splitext(name)
+        if not _IMPORT_ID_RE.match(import_id):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if ext == ".json":
+                with open(path, encoding="utf-8") as f:
+                    expired = json.load(f)["expires_at"] < now
+            else:
+                # Data file left behind without metadata (e.g. worker crashed mid-upload)
+                expired = not os.path.exists(os.path.join(directory, import_id + ".json")) and (
+                    os.path.getmtime(path) + settings.IMPORT_TTL_SECONDS < now
+                )
+        except (OSError, ValueError, KeyError):
+            expired = True
+        if expired:
+            delete_import(import_id)
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .metrics import LLM_CALL_SECONDS, LLM_CALLS, LLM_HEDGES
+
+
+# -------------------------------------------------------------------
+# Resilient LLM invocation
+#
+# Every attempt runs under a deadline (LLM_TIMEOUT_SECONDS, capped by what
+# is left of LLM_TOTAL_DEADLINE_SECONDS). If the primary model has not
+# answered after its recent p95 latency, a duplicate request is fired and
+# the first response wins. After LLM_MAX_ATTEMPTS failed/timed-out attempts
+# the fallback model (GROQ_FALLBACK_MODEL_NAME) gets one try; if that fails
+# too, LLMUnavailable is raised and the caller uses its static template.
+# Attempts that miss the deadline are abandoned, not cancelled: the
+# client-side timeout on the model ends them shortly after.
+# -------------------------------------------------------------------
+
+
+class LLMUnavailable(RuntimeError):
+    """No model produced a response within the deadline."""
+
+
+class LatencyWindow:
+    """Recent successful latencies for one model."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.LLM_MAX_WORKERS, thread_name_prefix="llm")
+        return _executor
+
+
+class ResilientLLM:
+    """
+    Wraps a model factory, `factory(model_name) -> chat model`, with
+    deadlines, hedging and the fallback model. Models are built once per
+    (model name, json mode) and reused.
+    """
+
+    def __init__(self, factory: Callable[[str], object]):
+        self._factory = factory
+        self._models: Dict[Tuple[str, bool], object] = {}
+        self._latency: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name: str, json_mode: bool):
+        key = (model_name, json_mode)
+        with self._lock:
+            if key not in self._models:
+                model = self._factory(model_name)
+                if json_mode:
+                    model = model.bind(response_format={"type": "json_object"})
+                self._models[key] = model
+            return self._models[key]
+
+    def _window(self, model_name: str) -> LatencyWindow:
+        with self._lock:
+            return self._latency.setdefault(model_name, LatencyWindow())
+
+    def hedge_delay(self, model_name: str) -> float:
+        p95 = self._window(model_name).p95()
+        if p95 is None:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        return max(settings.LLM_HEDGE_MIN_DELAY_SECONDS, p95)
+
+    def invoke(self, messages: List, json_mode: bool = False):
+        return self.invoke_with_model(messages, json_mode)[0]
+
+    def invoke_with_model(self, messages: List, json_mode: bool = False) -> Tuple[object, str]:
+        """Like invoke, but also returns the name of the model that answered."""
+        started = time.monotonic()
+        plan = [settings.GROQ_MODEL_NAME] * max(1, settings.LLM_MAX_ATTEMPTS)
+        if settings.GROQ_FALLBACK_MODEL_NAME and settings.GROQ_FALLBACK_MODEL_NAME != settings.GROQ_MODEL_NAME:
+            plan.append(settings.GROQ_FALLBACK_MODEL_NAME)
+
+        last_error: Optional[BaseException] = None
+        for model_name in plan:
+            remaining = settings.LLM_TOTAL_DEADLINE_SECONDS - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            deadline = min(settings.LLM_TIMEOUT_SECONDS, remaining)
+            hedge = settings.LLM_HEDGE and model_name == settings.GROQ_MODEL_NAME
+            try:
+                return self._attempt(model_name, messages, json_mode, deadline, hedge), model_name
+            except Exception as exc:
+                last_error = exc
+        raise LLMUnavailable(f"no LLM response within {settings.LLM_TOTAL_DEADLINE_SECONDS}s") from last_error
+
+    def _attempt(self, model_name: str, messages: List, json_mode: bool, deadline: float, hedge: bool):
+        model = self._model(model_name, json_mode)
+        executor = _get_executor()
+        started = time.monotonic()
+
+        def call():
+            t0 = time.monotonic()
+            msg = model.invoke(messages)
+            return msg, time.monotonic() - t0
+
+        first = executor.submit(call)
+        pending = {first}
+        hedge_at = self.hedge_delay(model_name) if hedge else None
+        if hedge_at is not None and hedge_at >= deadline:
+            hedge_at = None
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            elapsed = time.monotonic() - started
+            if elapsed >= deadline:
+                break
+            wait_until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(pending, timeout=wait_until - elapsed, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    LLM_CALLS.inc(model=model_name, outcome="error")
+                    last_error = error
+                    continue
+                msg, seconds = future.result()
+                self._window(model_name).add(seconds)
+                LLM_CALL_SECONDS.observe(seconds, model=model_name)
+                LLM_CALLS.inc(model=model_name, outcome="ok" if future is first else "hedge_won")
+                return msg
+            if hedge_at is not None and time.monotonic() - started >= hedge_at:
+                # Slow (not failed) first request: race a duplicate against it
+                hedge_at = None
+                if pending:
+                    LLM_HEDGES.inc(model=model_name)
+                    pending.add(executor.submit(call))
+
+        if last_error is not None and not pending:
+            raise last_error
+        LLM_CALLS.inc(len(pending), model=model_name, outcome="timeout")
+        raise TimeoutError(f"{model_name} did not answer within {deadline:.1f}s")
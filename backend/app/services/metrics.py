@@ -0,0 +1,230 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+
+# -------------------------------------------------------------------
+# In-process metrics registry, rendered in the Prometheus text format
+# at GET /metrics.
+#
+# Each worker process keeps its own registry; scrape every worker (or
+# sum them in Prometheus). Recording is a dict lookup plus a few integer
+# increments under a lock, so it is cheap enough for per-query hooks.
+# -------------------------------------------------------------------
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_float(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf bucket], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(counts), total[0]) for k, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _format_float(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_float(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_CHAIN_SECONDS = REGISTRY.histogram(
+    "llm_chain_duration_seconds", "LLM chain/agent invocation latency.", ["tool"]
+)
+LLM_JSON_FALLBACKS = REGISTRY.counter(
+    "llm_json_fallback_total", "LLM outputs that failed JSON parsing and used the fallback template.", ["tool"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens used, by tool and kind (prompt/completion).", ["tool", "kind"]
+)
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "llm_prompt_tokens", "Prompt size per LLM call, in tokens.", ["tool"], TOKEN_BUCKETS
+)
+LLM_CALLS = REGISTRY.counter(
+    "llm_calls_total", "LLM request attempts by model and outcome (ok/hedge_won/error/timeout).", ["model", "outcome"]
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "llm_call_duration_seconds", "Latency of successful LLM requests, by model.", ["model"]
+)
+LLM_HEDGES = REGISTRY.counter(
+    "llm_hedged_requests_total", "Duplicate LLM requests fired after the hedge delay, by model.", ["model"]
+)
+LLM_TEMPLATE_FALLBACKS = REGISTRY.counter(
+    "llm_template_fallback_total", "Calls where every model failed and the static template was used.", ["tool"]
+)
+SENDGRID_SEND_SECONDS = REGISTRY.histogram(
+    "sendgrid_send_duration_seconds", "SendGrid send API latency."
+)
+SENDGRID_RESPONSES = REGISTRY.counter(
+    "sendgrid_responses_total", "SendGrid send API responses by HTTP status.", ["status"]
+)
+EMAILS_SUPPRESSED = REGISTRY.counter(
+    "emails_suppressed_total", "Emails not sent because the recipient is on the suppression list.", ["path"]
+)
+EXPORT_ROWS = REGISTRY.counter(
+    "campaign_export_rows_total", "Rows streamed by campaign exports, by format.", ["format"]
+)
+WEBHOOK_EVENTS = REGISTRY.counter(
+    "webhook_events_total", "SendGrid webhook events received, by event type and outcome.", ["event", "outcome"]
+)
+DB_QUERIES = REGISTRY.counter(
+    "db_queries_total", "SQL statements executed, by route.", ["route"]
+)
+DB_QUERY_SECONDS = REGISTRY.counter(
+    "db_query_seconds_total", "Time spent executing SQL statements, by route.", ["route"]
+)
+DB_REQUEST_QUERIES = REGISTRY.histogram(
+    "db_request_queries", "SQL statements per request, by route.", ["route"], QUERY_COUNT_BUCKETS
+)
+DB_REQUEST_SECONDS = REGISTRY.histogram(
+    "db_request_query_seconds", "Cumulative SQL time per request, by route.", ["route"], DB_BUCKETS
+)
+
+
+def record_background_query(seconds: float) -> None:
+    """Statements outside an HTTP request (agent tools, scripts)."""
+    DB_QUERIES.inc(route="background")
+    DB_QUERY_SECONDS.inc(seconds, route="background")
+
+
+def record_request_queries(route: str, count: int, seconds: float) -> None:
+    DB_REQUEST_QUERIES.observe(count, route=route)
+    if count:
+        DB_QUERIES.inc(count, route=route)
+        DB_QUERY_SECONDS.inc(seconds, route=route)
+        DB_REQUEST_SECONDS.observe(seconds, route=route)
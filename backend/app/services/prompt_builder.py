@@ -0,0 +1,183 @@
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Campaign, Contact, SequenceStep
+from .metrics import LLM_PROMPT_TOKENS, LLM_TOKENS
+
+
+# -------------------------------------------------------------------
+# Generation prompt builder
+#
+# Prompts are split into a system message that is identical for every
+# contact of a campaign (global rules first, then the campaign's template
+# and product summary) and a short human message with the recipient and
+# step. Provider-side prompt caching matches on the prefix, so only the
+# per-contact tail is new input for each draft. Free-text fields are cut
+# to PROMPT_*_TOKENS budgets; an oversized product description is
+# condensed by the LLM once per campaign and stored on the campaign.
+# -------------------------------------------------------------------
+
+# Word pieces of up to 4 chars, or single punctuation marks: close enough to
+# BPE counts for budgeting without shipping a tokenizer.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return len(_TOKEN_RE.findall(text or ""))
+
+
+def messages_tokens(messages: List[BaseMessage]) -> int:
+    # ~4 tokens of chat framing per message
+    return sum(estimate_tokens(str(m.content)) + 4 for m in messages)
+
+
+def truncate_to_tokens(text: Optional[str], budget: int) -> str:
+    """Cut `text` to about `budget` tokens at a word boundary."""
+    text = " ".join((text or "").split())
+    pieces = list(_TOKEN_RE.finditer(text))
+    if len(pieces) <= budget:
+        return text
+    head = text[: pieces[budget - 1].end()] if budget > 0 else ""
+    space = head.rfind(" ")
+    if space > len(head) // 2:
+        head = head[:space]
+    return head.rstrip(" ,;:-") + "…"
+
+
+GENERATION_RULES = """You are an email writing assistant helping a single user send a short, professional yet personal sales/marketing email.
+
+Each request gives the recipient and the step of the email sequence. Tailor the content to the step: initial outreach might introduce, follow-ups build on previous contact, finals might close or create urgency.
+
+Constraints:
+- Keep body under 180 words.
+- The body must start with "Dear <recipient first name>,".
+- Mention the company and, if relevant, the role.
+- Use a friendly, concise tone.
+- No emojis.
+- Sign off with "Best regards, {sender_first_name}".
+
+Return ONLY a valid JSON object with exactly two string fields:
+- "subject" → the subject line
+- "body" → the email body content only (do not include greeting or sign-off in the JSON body field, as they are fixed)
+
+Do NOT include any explanation, markdown, or backticks. Only the JSON."""
+
+SUMMARY_PROMPT = """Condense this product description to at most {words} words for use in short sales emails.
+Keep concrete benefits, names and numbers. Return only the condensed text.
+
+{description}"""
+
+
+@dataclass
+class GenerationPrompt:
+    messages: List[BaseMessage]
+    estimated_tokens: int
+
+
+def campaign_system_prompt(campaign: Campaign, product_summary: str) -> str:
+    parts = [GENERATION_RULES.format(sender_first_name=settings.SENDER_FIRST_NAME)]
+    if campaign.base_prompt_template:
+        template = truncate_to_tokens(campaign.base_prompt_template, settings.PROMPT_TEMPLATE_TOKENS)
+        parts.append("Campaign instructions:\n" + template)
+    parts.append(f"Product:\n- Name: {campaign.product_name}\n- Description: {product_summary}")
+    return "\n\n".join(parts)
+
+
+def build_generation_prompt(
+    campaign: Campaign, product_summary: str, contact: Contact, step: SequenceStep
+) -> GenerationPrompt:
+    field = settings.PROMPT_FIELD_TOKENS
+    recipient = (
+        "Recipient:\n"
+        f"- First name: {truncate_to_tokens(contact.first_name, field)}\n"
+        f"- Company: {truncate_to_tokens(contact.company, field)}\n"
+        f"- Role: {truncate_to_tokens(contact.role, field)}\n"
+        f"- Hobbies: {truncate_to_tokens(contact.hobbies, settings.PROMPT_HOBBIES_TOKENS)}\n"
+        f"- MBTI personality type: {truncate_to_tokens(contact.mbti_type, 4)}\n\n"
+        f"Sequence step: {step.step_number} ({step.name})"
+    )
+    messages = [
+        SystemMessage(content=campaign_system_prompt(campaign, product_summary)),
+        HumanMessage(content=recipient),
+    ]
+    return GenerationPrompt(messages=messages, estimated_tokens=messages_tokens(messages))
+
+
+def generation_fingerprint(campaign: Campaign, contact: Contact, step: SequenceStep, model_name: str) -> str:
+    """
+    sha256 over everything a generated draft depends on: contact and product
+    fields, the campaign template, the step, the model and the prompt rules
+    and budgets. Stored on the draft; regenerate compares against it.
+    """
+    inputs = {
+        "contact": [contact.first_name, contact.company, contact.role, contact.hobbies, contact.mbti_type],
+        "product": [campaign.product_name, campaign.product_description],
+        "template": campaign.base_prompt_template,
+        "step": [step.step_number, step.name],
+        "model": model_name,
+        "rules": [
+            GENERATION_RULES,
+            settings.SENDER_FIRST_NAME,
+            settings.PROMPT_PRODUCT_TOKENS,
+            settings.PROMPT_TEMPLATE_TOKENS,
+            settings.PROMPT_HOBBIES_TOKENS,
+            settings.PROMPT_FIELD_TOKENS,
+        ],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def campaign_product_summary(db: Session, campaign: Campaign, llm) -> str:
+    """
+    The product description as used in prompts: as-is when within budget,
+    otherwise condensed by `llm` once and stored on the campaign (redone
+    when the description changes). If the summary call fails the
+    description is truncated (and not stored).
+    """
+    description = campaign.product_description or ""
+    budget = settings.PROMPT_PRODUCT_TOKENS
+    if estimate_tokens(description) <= budget:
+        return " ".join(description.split())
+    source = hashlib.sha256(description.encode()).hexdigest()
+    if campaign.product_summary and campaign.product_summary_source == source:
+        return campaign.product_summary
+    if not settings.PROMPT_SUMMARIZE_PRODUCT:
+        return truncate_to_tokens(description, budget)
+
+    messages = [HumanMessage(content=SUMMARY_PROMPT.format(words=int(budget * 0.7), description=description))]
+    try:
+        msg = llm.invoke(messages)
+    except Exception:
+        return truncate_to_tokens(description, budget)
+    record_token_usage("product_summary", msg, messages)
+    summary = truncate_to_tokens(str(msg.content).strip(), budget)
+    if not summary:
+        return truncate_to_tokens(description, budget)
+    campaign.product_summary = summary
+    campaign.product_summary_source = source
+    db.commit()
+    return summary
+
+
+def token_usage(msg, messages: List[BaseMessage]) -> Tuple[int, int]:
+    """(prompt, completion) tokens: provider-reported when present, else estimated."""
+    usage = getattr(msg, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    content = msg.content if hasattr(msg, "content") else str(msg)
+    return messages_tokens(messages), estimate_tokens(str(content))
+
+
+def record_token_usage(tool: str, msg, messages: List[BaseMessage]) -> Tuple[int, int]:
+    prompt_tokens, completion_tokens = token_usage(msg, messages)
+    LLM_PROMPT_TOKENS.observe(prompt_tokens, tool=tool)
+    LLM_TOKENS.inc(prompt_tokens, tool=tool, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, tool=tool, kind="completion")
+    return prompt_tokens, completion_tokens
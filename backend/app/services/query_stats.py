@@ -0,0 +1,160 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .metrics import record_background_query, record_request_queries
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------
+# Per-request SQL statement counter and N+1 detector
+#
+# The HTTP middleware puts a RequestQueryStats in a context variable;
+# engine cursor hooks (app.db.instrument_engine) add every statement to
+# it. At the end of the request we:
+#   - set X-DB-Query-Count and Server-Timing response headers,
+#   - log the totals, and warn when the same statement shape ran
+#     DB_REPEATED_STATEMENT_THRESHOLD times or more (a loop issuing one
+#     query per row),
+#   - check QUERY_BUDGETS. With DB_QUERY_BUDGET_STRICT=true (CI) a
+#     violation turns the response into a 500, so regressions fail tests.
+#
+# A streamed body (no Content-Length, e.g. the export and the SSE stream)
+# runs its queries after the headers are sent. Those responses get no
+# query headers; checked_stream() does the accounting once the body is
+# exhausted, and in strict mode aborts the response on a violation.
+# -------------------------------------------------------------------
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Prefix the API routers are mounted under (app.main). Depending on the
+# starlette version, scope["route"].path may or may not include it, so
+# route_key() strips it and the tables below are keyed without it.
+API_PREFIX = "/api"
+
+# Max statements per request, keyed "METHOD /route". Only routes whose
+# query count should not grow with the data are listed.
+QUERY_BUDGETS: Dict[str, int] = {
+    "GET /campaigns/{campaign_id}": 5,
+    "GET /campaigns/{campaign_id}/events": 2,
+    "GET /campaigns/{campaign_id}/export": 2,
+    "GET /emails/": 2,
+    "PUT /emails/{email_id}": 4,
+    "POST /emails/bulk-update": 1,
+    "POST /emails/send": 5,
+    "GET /contacts": 2,
+    "POST /upload-contacts": 0,
+    "POST /contacts/confirm": 12,
+    "POST /webhooks/sendgrid-events": 5,
+    "POST /webhooks/reply": 6,
+}
+
+# Routes that run one LLM round (and its tool queries) per item by design.
+REPEATS_ALLOWED = {
+    "POST /campaigns/{campaign_id}/generate-emails",
+    "POST /webhooks/reply",
+}
+
+# Bind parameter lists from expanding IN (...) vary in length; collapse them.
+_PARAM = r"(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)"
+_IN_LIST_RE = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_LIST_RE.sub("(...)", _SPACE_RE.sub(" ", statement).strip())
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [
+            (statement_shape(statement), n)
+            for statement, n in self.statements.most_common()
+            if n >= threshold
+        ]
+
+
+current_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def record_query(statement: str, seconds: float) -> None:
+    stats = current_query_stats.get()
+    if stats is None:
+        record_background_query(seconds)
+        return
+    stats.count += 1
+    stats.seconds += seconds
+    # Keyed on the raw SQL (cheap); shapes are only computed when reporting.
+    stats.statements[statement] += 1
+
+
+def route_key(method: str, route_path: str) -> str:
+    """"METHOD /route" for the budget tables, whether or not the path has the mount prefix."""
+    if route_path.startswith(API_PREFIX + "/"):
+        route_path = route_path[len(API_PREFIX):]
+    return f"{method} {route_path}"
+
+
+def finish_request(route: str, stats: RequestQueryStats) -> List[str]:
+    """Record metrics and log; returns budget/N+1 problems for the route."""
+    record_request_queries(route, stats.count, stats.seconds)
+    logger.debug("%s: %d queries in %.1f ms", route, stats.count, stats.seconds * 1000)
+
+    problems = []
+    budget = QUERY_BUDGETS.get(route)
+    if budget is not None and stats.count > budget:
+        problems.append(f"{route} ran {stats.count} SQL statements (budget {budget})")
+    if route not in REPEATS_ALLOWED:
+        for shape, n in stats.repeated(settings.DB_REPEATED_STATEMENT_THRESHOLD):
+            problems.append(f"{route} ran the same statement {n} times (N+1?): {shape[:300]}")
+    for problem in problems:
+        logger.warning(problem)
+    return problems
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A streamed response broke its query budget (strict mode only)."""
+
+
+async def checked_stream(body: AsyncIterator[bytes], route: str, stats: RequestQueryStats) -> AsyncIterator[bytes]:
+    """Pass a streamed body through, then run finish_request with its queries counted."""
+    async for chunk in body:
+        yield chunk
+    problems = finish_request(route, stats)
+    if problems and settings.DB_QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded("; ".join(problems))
+
+
+def query_stats_headers(stats: RequestQueryStats) -> Dict[str, str]:
+    return {
+        QUERY_COUNT_HEADER: str(stats.count),
+        SERVER_TIMING_HEADER: f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"',
+    }
+
+
+def assert_query_budget(response, max_queries: Optional[int] = None, route: Optional[str] = None) -> int:
+    """
+    Test helper: assert a response stayed within its query budget.
+
+        resp = client.get(f"/api/campaigns/{cid}")
+        assert_query_budget(resp, route="GET /campaigns/{campaign_id}")
+
+    Uses `max_queries` if given, else QUERY_BUDGETS[route]. Returns the count.
+    Streamed responses carry no count; strict mode checks them instead.
+    """
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    limit = max_queries if max_queries is not None else QUERY_BUDGETS[route]
+    assert count <= limit, f"{route or response.url} ran {count} SQL statements, budget is {limit}"
+    return count
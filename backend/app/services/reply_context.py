@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import literal, select
+from sqlalchemy.orm import Session, aliased
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models import Contact, EmailInstance
+from .prompt_builder import estimate_tokens, truncate_to_tokens
+
+
+# -------------------------------------------------------------------
+# Reply context
+#
+# Everything the reply tools need about the email being answered: the
+# email, its recipient and the earlier emails of the thread, which are found
+# by following parent_email_id. It is loaded with one recursive query per
+# /webhooks/reply run and shared with the agent's tool calls through
+# `current_reply_context`, so classify, draft and send do not each re-fetch it.
+# -------------------------------------------------------------------
+
+# Guards against parent_email_id cycles in bad data
+MAX_THREAD_DEPTH = 20
+
+
+@dataclass
+class ThreadMessage:
+    id: int
+    subject: str
+    body_text: str
+    is_reply: bool
+    sent_at: Optional[datetime]
+
+
+@dataclass
+class ReplyContext:
+    original: ThreadMessage
+    campaign_id: int
+    contact_id: int
+    contact_email: str
+    contact_first_name: Optional[str]
+    # Earlier emails in the thread, oldest first (excludes `original`)
+    history: List[ThreadMessage] = field(default_factory=list)
+
+    def history_text(self, budget: Optional[int] = None) -> str:
+        """Most recent thread messages that fit in `budget` tokens, oldest first."""
+        budget = settings.PROMPT_THREAD_HISTORY_TOKENS if budget is None else budget
+        parts: List[str] = []
+        used = 0
+        for message in reversed(self.history):
+            sent = message.sent_at.strftime("%Y-%m-%d") if message.sent_at else "draft"
+            text = f"[{sent}] Subject: {message.subject}\n{message.body_text}"
+            tokens = estimate_tokens(text)
+            if used + tokens > budget:
+                if not parts:  # always keep (part of) the latest message
+                    parts.append(truncate_to_tokens(text, budget))
+                break
+            parts.append(text)
+            used += tokens
+        return "\n\n".join(reversed(parts)) or "(none)"
+
+
+current_reply_context: ContextVar[Optional[ReplyContext]] = ContextVar("current_reply_context", default=None)
+
+
+def load_reply_context(db: Session, original_email_id: int) -> Optional[ReplyContext]:
+    """The email, its recipient and its ancestors in one recursive query."""
+    thread = (
+        select(EmailInstance.id, EmailInstance.parent_email_id, literal(0).label("depth"))
+        .where(EmailInstance.id == original_email_id)
+        .cte("thread", recursive=True)
+    )
+    parent = aliased(EmailInstance)
+    thread = thread.union_all(
+        select(parent.id, parent.parent_email_id, thread.c.depth + 1).where(
+            parent.id == thread.c.parent_email_id, thread.c.depth < MAX_THREAD_DEPTH
+        )
+    )
+    rows = db.execute(
+        select(
+            thread.c.depth,
+            EmailInstance.id,
+            EmailInstance.subject,
+            EmailInstance.body_text,
+            EmailInstance.is_reply,
+            EmailInstance.sent_at,
+            EmailInstance.campaign_id,
+            EmailInstance.contact_id,
+            Contact.email,
+            Contact.first_name,
+        )
+        .select_from(thread)
+        .join(EmailInstance, EmailInstance.id == thread.c.id)
+        .join(Contact, Contact.id == EmailInstance.contact_id)
+        .order_by(thread.c.depth.desc())
+    ).all()
+    if not rows or rows[-1].depth != 0:
+        return None
+
+    messages = [ThreadMessage(r.id, r.subject, r.body_text, bool(r.is_reply), r.sent_at) for r in rows]
+    original = rows[-1]
+    return ReplyContext(
+        original=messages[-1],
+        campaign_id=original.campaign_id,
+        contact_id=original.contact_id,
+        contact_email=original.email,
+        contact_first_name=original.first_name,
+        history=messages[:-1],
+    )
+
+
+def get_reply_context(original_email_id: int) -> Optional[ReplyContext]:
+    """The shared context when this run has one for the email, else a fresh load."""
+    ctx = current_reply_context.get()
+    if ctx is not None and ctx.original.id == original_email_id:
+        return ctx
+    db = SessionLocal()
+    try:
+        return load_reply_context(db, original_email_id)
+    finally:
+        db.close()
+
+
+@contextmanager
+def use_reply_context(ctx: ReplyContext):
+    token = current_reply_context.set(ctx)
+    try:
+        yield ctx
+    finally:
+        current_reply_context.reset(token)
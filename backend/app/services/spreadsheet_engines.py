@@ -0,0 +1,196 @@
+import csv
+import importlib.util
+import os
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ..config import settings
+
+
+# -------------------------------------------------------------------
+# Pluggable readers for uploaded contact files
+#
+# Every engine yields DataFrames of roughly `chunksize` rows with the
+# file's own header as column names; a file with a header but no rows
+# yields one empty frame, so the columns can still be checked. Nothing
+# is yielded for a file without a header. select_engine() picks the fastest
+# one that is installed and suitable for the file; benchmarks/bench_import.py
+# compares them on generated fixtures.
+# -------------------------------------------------------------------
+
+ChunkReader = Callable[[BinaryIO, int], Iterator[pd.DataFrame]]
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _header_columns(header: Sequence) -> List[str]:
+    return [str(h) if h not in (None, "") else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+
+def _rows_to_chunks(
+    rows: Iterator[Sequence], chunksize: int, clean_value: Optional[Callable] = None
+) -> Iterator[pd.DataFrame]:
+    """Group row tuples (header first) into object-dtype DataFrames."""
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header_columns(header)
+    width = len(columns)
+
+    buffer: List[tuple] = []
+    yielded = False
+    for row in rows:
+        if clean_value is not None:
+            row = [clean_value(v) for v in row]
+        buffer.append(tuple(row[:width]) + (None,) * (width - len(row)))
+        if len(buffer) >= chunksize:
+            yield pd.DataFrame(buffer, columns=columns, dtype=object)
+            buffer, yielded = [], True
+    if buffer or not yielded:
+        yield pd.DataFrame(buffer, columns=columns, dtype=object)
+
+
+def csv_pandas_chunks(source: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    try:
+        return pd.read_csv(source, chunksize=chunksize, dtype=str)
+    except pd.errors.EmptyDataError:
+        return iter(())  # no header
+
+
+def csv_pyarrow_chunks(source: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Multi-threaded Arrow CSV reader, streamed block by block."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    # Read the header ourselves so every column is typed as string (no
+    # inference turning zip codes or phone numbers into numbers).
+    start = source.tell()
+    first_line = source.readline().decode("utf-8-sig")
+    header_only = not source.read(1)
+    source.seek(start)
+    header = next(csv.reader([first_line]), [])
+    if not header:
+        return
+    if header_only:
+        # Arrow cannot infer the columns from a lone header line
+        yield pd.DataFrame(columns=header, dtype=object)
+        return
+
+    reader = pacsv.open_csv(
+        source,
+        read_options=pacsv.ReadOptions(block_size=8 << 20),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+    pending = []
+    pending_rows = 0
+    yielded = False
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= chunksize:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, pending_rows, yielded = [], 0, True
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+    elif not yielded:
+        yield reader.schema.empty_table().to_pandas()
+
+
+def xlsx_openpyxl_chunks(source: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """openpyxl read-only mode streams rows instead of loading the whole sheet."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield from _rows_to_chunks(workbook.active.iter_rows(values_only=True), chunksize)
+    finally:
+        workbook.close()
+
+
+def _calamine_value(value):
+    # calamine reports blanks as "" and every number as float
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def xlsx_calamine_chunks(source: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Rust-based reader; much faster than openpyxl but holds the sheet in memory."""
+    from python_calamine import CalamineWorkbook
+
+    sheet = CalamineWorkbook.from_filelike(source).get_sheet_by_index(0)
+    yield from _rows_to_chunks(iter(sheet.iter_rows()), chunksize, _calamine_value)
+
+
+def xls_pandas_chunks(source: BinaryIO, chunksize: int) -> Iterator[pd.DataFrame]:
+    # Legacy .xls has no streaming reader; these files are small by format.
+    yield pd.read_excel(source, dtype=str)
+
+
+# (name, reader, required module) in order of preference per file kind.
+ENGINES: Dict[str, List[Tuple[str, ChunkReader, Optional[str]]]] = {
+    "csv": [
+        ("pyarrow", csv_pyarrow_chunks, "pyarrow"),
+        ("pandas", csv_pandas_chunks, None),
+    ],
+    "xlsx": [
+        ("calamine", xlsx_calamine_chunks, "python_calamine"),
+        ("openpyxl", xlsx_openpyxl_chunks, "openpyxl"),
+    ],
+    "xls": [
+        ("pandas", xls_pandas_chunks, None),
+    ],
+}
+
+
+def file_kind(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith(".xls"):
+        return "xls"
+    return "xlsx"
+
+
+def available_engines(kind: str) -> List[str]:
+    return [name for name, _, module in ENGINES[kind] if module is None or _installed(module)]
+
+
+def select_engine(filename: str, size_bytes: int, preferred: Optional[str] = None) -> Tuple[str, ChunkReader]:
+    """
+    Pick a reader for the file: `preferred` (or SPREADSHEET_ENGINE) if it is
+    installed, otherwise the fastest available one. calamine is skipped for
+    workbooks above XLSX_CALAMINE_MAX_BYTES to keep memory bounded.
+    """
+    kind = file_kind(filename)
+    preferred = preferred or settings.SPREADSHEET_ENGINE
+    candidates = [
+        (name, reader)
+        for name, reader, module in ENGINES[kind]
+        if module is None or _installed(module)
+    ]
+    if preferred:
+        for name, reader in candidates:
+            if name == preferred:
+                return name, reader
+    if kind == "xlsx" and size_bytes > settings.XLSX_CALAMINE_MAX_BYTES:
+        candidates = [c for c in candidates if c[0] != "calamine"] or candidates
+    return candidates[0]
+
+
+def read_chunks(
+    source: BinaryIO, filename: str, chunksize: int, engine: Optional[str] = None
+) -> Iterator[pd.DataFrame]:
+    start = source.tell()
+    size = source.seek(0, os.SEEK_END) - start
+    source.seek(start)
+    _, reader = select_engine(filename, size, engine)
+    return reader(source, chunksize)
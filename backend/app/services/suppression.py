@@ -0,0 +1,81 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models import EventType, Suppression
+
+
+# -------------------------------------------------------------------
+# Suppression list
+#
+# The suppressions table is the source of truth (written by the SendGrid
+# webhook). Each worker mirrors it in SUPPRESSIONS, a dict keyed by address,
+# so a send batch is filtered with one O(1) lookup per recipient. Senders
+# call refresh() first: it reads only rows added since the last refresh (by
+# id, re-reading a small overlap for ids committed out of order), so other
+# workers' suppressions are picked up for the price of one indexed query.
+# -------------------------------------------------------------------
+
+SUPPRESSING_EVENTS = {EventType.bounce, EventType.spam}
+
+# Ids below the high-water mark that are re-read on each refresh
+REFRESH_OVERLAP_IDS = 1000
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    return email.strip().lower() if email else None
+
+
+class SuppressionIndex:
+    def __init__(self):
+        self._reasons: Dict[str, str] = {}
+        self._high_water = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._reasons)
+
+    def __contains__(self, email: str) -> bool:
+        return email in self._reasons
+
+    def reason(self, email: str) -> Optional[str]:
+        return self._reasons.get(email)
+
+    def add(self, email: str, reason: str) -> None:
+        """Record a suppression this worker has just committed."""
+        self._reasons[email] = reason
+
+    def refresh(self, db: Session) -> int:
+        """Load rows added since the last refresh; returns how many were read."""
+        with self._lock:
+            since = max(0, self._high_water - REFRESH_OVERLAP_IDS)
+            rows = db.execute(
+                select(Suppression.id, Suppression.email, Suppression.reason)
+                .where(Suppression.id > since)
+                .order_by(Suppression.id)
+            ).all()
+            for row in rows:
+                self._reasons[row.email] = row.reason
+                self._high_water = max(self._high_water, row.id)
+            return len(rows)
+
+
+SUPPRESSIONS = SuppressionIndex()
+
+
+def insert_suppressions_stmt(dialect_name: str, rows: Iterable[Dict]):
+    """INSERT ... ON CONFLICT (email) DO NOTHING for the given dialect."""
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    return insert(Suppression).values(list(rows)).on_conflict_do_nothing(index_elements=["email"])
+
+
+def split_suppressed(recipients: Iterable[Tuple[object, str]]):
+    """Split (item, address) pairs into (sendable, suppressed) lists."""
+    sendable, suppressed = [], []
+    for item, address in recipients:
+        (suppressed if address in SUPPRESSIONS else sendable).append((item, address))
+    return sendable, suppressed
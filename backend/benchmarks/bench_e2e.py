@@ -0,0 +1,333 @@
+"""
+Offline end-to-end benchmark: drives the real FastAPI app in-process with
+Groq and SendGrid replaced by latency-configurable fakes (benchmarks/fakes.py)
+and reports throughput and p50/p95/p99 per scenario and data size.
+
+    cd backend
+    python -m benchmarks.bench_e2e --sizes 1000 10000 --json results.json
+    python -m benchmarks.bench_e2e --database-url postgresql+psycopg://localhost/email_bench
+
+Scenarios: contact import (upload + confirm), generate-emails, send,
+SendGrid webhook ingestion, campaign status (cold and cached).
+Without --database-url a throwaway SQLite file is used. A Postgres
+database is used as-is (tables are created if missing), so point it at a
+scratch database. Every run uses fresh email addresses.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Scenario:
+    """Collects per-request latencies (and SQL counts) for one scenario/size."""
+
+    def __init__(self, name: str, size: int, unit: str):
+        self.name = name
+        self.size = size
+        self.unit = unit
+        self.latencies: List[float] = []
+        self.query_counts: List[int] = []
+        self.items = 0
+        self.errors = 0
+
+    def call(self, fn: Callable, items: int = 1):
+        started = time.perf_counter()
+        response = fn()
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors += 1
+        else:
+            self.items += items
+        count = response.headers.get("x-db-query-count")
+        if count is not None:
+            self.query_counts.append(int(count))
+        return response
+
+    def result(self) -> Dict:
+        latencies = sorted(self.latencies)
+        elapsed = sum(latencies)
+        return {
+            "scenario": self.name,
+            "size": self.size,
+            "requests": len(latencies),
+            "errors": self.errors,
+            "items": self.items,
+            "unit": self.unit,
+            "seconds": round(elapsed, 4),
+            "throughput_per_sec": round(self.items / elapsed, 1) if elapsed else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "db_queries_per_request": (
+                round(sum(self.query_counts) / len(self.query_counts), 1) if self.query_counts else None
+            ),
+        }
+
+
+def configure_environment(args) -> None:
+    """Must run before anything under app/ is imported (settings load at import)."""
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="bench_e2e_"), "bench.db"
+    )
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.environ.pop("DATABASE_ASYNC_URL", None)
+    for key, value in {
+        "SENDGRID_API_KEY": "bench",
+        "SENDGRID_FROM_EMAIL": "bench@example.com",
+        "GROQ_API_KEY": "bench",
+        "IMPORT_STAGING_DIR": tempfile.mkdtemp(prefix="bench_imports_"),
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def install_fakes(args):
+    from app.services import agent, email_service
+    from benchmarks.fakes import FakeChatGroq, FakeSendGridClient
+
+    llm_latency = args.llm_latency_ms / 1000
+    agent.ChatGroq = lambda **kwargs: FakeChatGroq(latency_s=llm_latency, jitter=args.jitter)
+    email_service._sg_client = FakeSendGridClient(args.sendgrid_latency_ms / 1000, args.jitter)
+
+
+def contacts_csv(run_id: str, rows: int) -> bytes:
+    lines = ["email,first_name,company,role"]
+    lines.extend(f"bench{run_id}-{i}@example.com,Name{i},Company {i % 500},Engineer" for i in range(rows))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def seed_campaign(run_id: str, contacts: int, email_status=None, events_per_email: int = 0) -> int:
+    """
+    Campaign with one step and `contacts` members, via Core bulk inserts.
+    With `email_status`, each member also gets one email in that status.
+    """
+    from sqlalchemy import insert, select
+    from app.db import SessionLocal
+    from app.models import (
+        Campaign, CampaignContact, Contact, EmailEvent, EmailInstance, EventType, SequenceStep,
+    )
+
+    db = SessionLocal()
+    try:
+        campaign = Campaign(name=f"bench {run_id}", product_name="Bench", product_description="Benchmark product")
+        db.add(campaign)
+        db.flush()
+        step = SequenceStep(campaign_id=campaign.id, step_number=1, name="Initial")
+        db.add(step)
+        db.flush()
+
+        prefix = f"seed{run_id}-{campaign.id}-"
+        db.execute(insert(Contact), [
+            {"email": f"{prefix}{i}@example.com", "first_name": f"Name{i}", "company": "Acme"}
+            for i in range(contacts)
+        ])
+        contact_ids = db.scalars(
+            select(Contact.id).where(Contact.email.like(prefix + "%")).order_by(Contact.id)
+        ).all()
+        db.execute(insert(CampaignContact), [
+            {"campaign_id": campaign.id, "contact_id": cid} for cid in contact_ids
+        ])
+        if email_status is None:
+            db.commit()
+            return campaign.id
+        db.execute(insert(EmailInstance), [
+            {
+                "campaign_id": campaign.id,
+                "contact_id": cid,
+                "sequence_step_id": step.id,
+                "subject": "Hello",
+                "body_text": "Benchmark body " * 20,
+                "status": email_status,
+                "is_reply": False,
+                "sent_at": datetime.utcnow() if email_status.value == "sent" else None,
+            }
+            for cid in contact_ids
+        ])
+        if events_per_email:
+            email_ids = db.scalars(
+                select(EmailInstance.id).where(EmailInstance.campaign_id == campaign.id)
+            ).all()
+            kinds = [EventType.delivered, EventType.open, EventType.click, EventType.open]
+            db.execute(insert(EmailEvent), [
+                {"email_id": eid, "event_type": kinds[n % len(kinds)], "event_metadata": {}}
+                for eid in email_ids
+                for n in range(events_per_email)
+            ])
+        db.commit()
+        return campaign.id
+    finally:
+        db.close()
+
+
+def sendgrid_events(email_ids: List[int], count: int) -> List[dict]:
+    kinds = ["delivered", "open", "open", "click", "open", "bounce"]
+    return [
+        {
+            "event": kinds[n % len(kinds)],
+            "email": "bench@example.com",
+            "timestamp": int(time.time()),
+            "sg_event_id": uuid.uuid4().hex,
+            "email_instance_id": email_ids[n % len(email_ids)],
+        }
+        for n in range(count)
+    ]
+
+
+def run_size(client, args, size: int) -> List[Dict]:
+    from app.models import EmailInstance, EmailStatus
+    from app.db import SessionLocal
+    from app.services.campaign_cache import bump_campaign_version
+
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+
+    # Import: upload + confirm of a `size`-row CSV
+    upload = Scenario("import_upload", size, "rows")
+    confirm = Scenario("import_confirm", size, "rows")
+    for r in range(args.repeat):
+        data = contacts_csv(f"{run_id}{r}", size)
+        resp = upload.call(
+            lambda: client.post("/api/upload-contacts", files={"file": ("contacts.csv", io.BytesIO(data), "text/csv")}),
+            items=size,
+        )
+        import_id = resp.json().get("import_id")
+        confirm.call(
+            lambda: client.post("/api/contacts/confirm", json={
+                "campaign_name": f"bench {run_id}",
+                "product_name": "Bench",
+                "product_description": "Benchmark product",
+                "import_id": import_id,
+            }),
+            items=size,
+        )
+    results += [upload.result(), confirm.result()]
+
+    # Generate: one LLM-backed draft per contact, on a bounded audience
+    generate_contacts = min(size, args.generate_contacts)
+    generate = Scenario("generate_emails", generate_contacts, "emails")
+    for _ in range(args.repeat):
+        campaign_id = seed_campaign(run_id, generate_contacts)
+        generate.call(
+            lambda: client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={}),
+            items=generate_contacts,
+        )
+    results.append(generate.result())
+
+    # Send: every draft of step 1 through the fake SendGrid
+    send_size = min(size, args.send_contacts)
+    send = Scenario("send_emails", send_size, "emails")
+    for _ in range(args.repeat):
+        campaign_id = seed_campaign(run_id, send_size, EmailStatus.draft)
+        send.call(
+            lambda: client.post(f"/api/emails/send?campaign_id={campaign_id}", json={"step_number": 1}),
+            items=send_size,
+        )
+    results.append(send.result())
+
+    # Webhook ingestion and status against a campaign with `size` sent emails
+    campaign_id = seed_campaign(run_id, size, EmailStatus.sent, args.events_per_email)
+    db = SessionLocal()
+    email_ids = [i for (i,) in db.query(EmailInstance.id).filter(EmailInstance.campaign_id == campaign_id)]
+    db.close()
+
+    webhook = Scenario("webhook_ingest", size, "events")
+    total_events = size * args.events_per_email
+    for start in range(0, total_events, args.webhook_batch):
+        batch = sendgrid_events(email_ids, min(args.webhook_batch, total_events - start))
+        webhook.call(lambda: client.post("/api/webhooks/sendgrid-events", json=batch), items=len(batch))
+    results.append(webhook.result())
+
+    cold = Scenario("campaign_status_cold", size, "requests")
+    cached = Scenario("campaign_status_cached", size, "requests")
+    for _ in range(args.status_requests):
+        bump_campaign_version(campaign_id)
+        cold.call(lambda: client.get(f"/api/campaigns/{campaign_id}"))
+        cached.call(lambda: client.get(f"/api/campaigns/{campaign_id}"))
+    results += [cold.result(), cached.result()]
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="contacts per dataset")
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--sendgrid-latency-ms", type=float, default=20)
+    parser.add_argument("--jitter", type=float, default=0.2, help="fraction of latency, uniformly distributed")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of import/generate/send per size")
+    parser.add_argument("--generate-contacts", type=int, default=20, help="cap on contacts per generate run")
+    parser.add_argument("--send-contacts", type=int, default=200, help="cap on emails per send run")
+    parser.add_argument("--events-per-email", type=int, default=3)
+    parser.add_argument("--webhook-batch", type=int, default=500, help="events per webhook POST")
+    parser.add_argument("--status-requests", type=int, default=50)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    configure_environment(args)
+
+    from fastapi.testclient import TestClient
+    from app.db import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(engine)
+    install_fakes(args)
+    # Measure steady state, not the first-use import of pandas/pyarrow
+    from app.services import import_staging  # noqa: F401
+    client = TestClient(app)
+
+    results = []
+    print(f"{'scenario':<24}{'size':>8}{'reqs':>6}{'err':>5}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+    for size in args.sizes:
+        for r in run_size(client, args, size):
+            results.append(r)
+            print(
+                f"{r['scenario']:<24}{r['size']:>8}{r['requests']:>6}{r['errors']:>5}"
+                f"{str(r['throughput_per_sec']):>12}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                f"{str(r['db_queries_per_request']):>9}",
+                flush=True,
+            )
+
+    if args.json:
+        report = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "git_revision": git_revision(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "database": engine.dialect.name,
+                "llm_latency_ms": args.llm_latency_ms,
+                "sendgrid_latency_ms": args.sendgrid_latency_ms,
+                "jitter": args.jitter,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Campaign export benchmark: GET /campaigns/{id}/export in both formats at
+growing campaign sizes, in-process.
+
+    cd backend
+    python -m benchmarks.bench_export                          # 10k and 100k rows
+    python -m benchmarks.bench_export --rows 20000 200000 --json export.json
+
+Per size and format it reports rows/s, output size and the peak Python
+heap while streaming (tracemalloc, minus the response body the test client
+holds). The peak should stay flat as the row count grows; the run fails
+when the output does not round-trip to the expected row count.
+"""
+import argparse
+import csv
+import io
+import json
+import time
+import tracemalloc
+import uuid
+
+import pyarrow.parquet as pq  # imported up front so it does not count toward the first peak
+
+from benchmarks.bench_e2e import configure_environment, seed_campaign
+
+
+def stream_export(client, path: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    with client.stream("GET", path) as response:
+        if response.status_code != 200:
+            raise SystemExit(f"GET {path} -> {response.status_code}")
+        body = b"".join(response.iter_raw())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The test client buffers the body, and so does this function
+    return elapsed, body, max(peak - 2 * len(body), 0)
+
+
+def count_rows(fmt: str, body: bytes) -> int:
+    if fmt == "csv":
+        return sum(1 for _ in csv.reader(io.StringIO(body.decode()))) - 1
+    return pq.ParquetFile(io.BytesIO(body)).metadata.num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="campaign sizes to export")
+    parser.add_argument("--events-per-email", type=int, default=2)
+    parser.add_argument("--chunk-rows", type=int, help="override EXPORT_CHUNK_ROWS")
+    parser.add_argument("--database-url")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.db import Base, engine
+    from app.main import app
+    from app.models import EmailStatus
+
+    if args.chunk_rows:
+        settings.EXPORT_CHUNK_ROWS = args.chunk_rows
+    Base.metadata.create_all(engine)
+    client = TestClient(app)
+
+    warm_up = seed_campaign(uuid.uuid4().hex[:8], 100, EmailStatus.sent, args.events_per_email)
+    for fmt in ("csv", "parquet"):
+        stream_export(client, f"/api/campaigns/{warm_up}/export?format={fmt}")
+
+    results = []
+    print(f"{'rows':>9}{'format':>9}{'rows/s':>10}{'MB':>8}{'peak heap MB':>14}")
+    for rows in args.rows:
+        campaign_id = seed_campaign(uuid.uuid4().hex[:8], rows, EmailStatus.sent, args.events_per_email)
+        for fmt in ("csv", "parquet"):
+            elapsed, body, peak = stream_export(
+                client, f"/api/campaigns/{campaign_id}/export?format={fmt}"
+            )
+            if count_rows(fmt, body) != rows:
+                raise SystemExit(f"{fmt} export of {rows} rows returned {count_rows(fmt, body)}")
+            row = {
+                "rows": rows,
+                "format": fmt,
+                "rows_per_s": round(rows / elapsed),
+                "bytes": len(body),
+                "peak_heap_bytes": peak,
+            }
+            results.append(row)
+            print(
+                f"{rows:>9}{fmt:>9}{row['rows_per_s']:>10}"
+                f"{len(body) / 2**20:>8.1f}{peak / 2**20:>14.1f}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"chunk_rows": settings.EXPORT_CHUNK_ROWS, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
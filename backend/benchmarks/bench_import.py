@@ -0,0 +1,120 @@
+"""
+Contact import benchmark: parse generated CSV/XLSX fixtures with every
+installed spreadsheet engine and report wall time, throughput and peak
+Python memory.
+
+    cd backend
+    python -m benchmarks.bench_import                      # 10k, 100k and 1M rows
+    python -m benchmarks.bench_import --rows 100000 --kinds xlsx --json out.json
+
+Fixtures are cached under --fixtures-dir so repeat runs only time parsing.
+tracemalloc slows pure-Python readers noticeably; use --no-memory for timings.
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.services.contacts_import import parse_contacts_file
+from app.services.spreadsheet_engines import available_engines
+
+HEADER = ["Email Address", "First Name", "Company", "Job Title", "Interests", "MBTI"]
+
+
+def _row(i: int):
+    # ~2% missing, ~1% malformed, ~1% duplicated emails, like real exports
+    if i % 50 == 0:
+        email = None
+    elif i % 100 == 1:
+        email = f"user{i}.example.com"
+    elif i % 100 == 2:
+        email = "user1@example.com"
+    else:
+        email = f"User{i}@Example.com "
+    return [email, f"Name{i}", f"Company {i % 997}", "Engineer", "climbing, chess", "INTJ"]
+
+
+def make_csv(path: str, rows: int) -> None:
+    import csv
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow(_row(i))
+
+
+def make_xlsx(path: str, rows: int) -> None:
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for i in range(rows):
+        sheet.append(_row(i))
+    workbook.save(path)
+
+
+def fixture(directory: str, kind: str, rows: int) -> str:
+    path = os.path.join(directory, f"contacts_{rows}.{kind}")
+    if not os.path.exists(path):
+        print(f"generating {path} ...", flush=True)
+        (make_csv if kind == "csv" else make_xlsx)(path, rows)
+    return path
+
+
+def run_one(path: str, engine: str, trace_memory: bool = True) -> dict:
+    with open(path, "rb") as f:
+        data = io.BytesIO(f.read())  # time parsing, not disk reads
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    _, stats = parse_contacts_file(data, os.path.basename(path), engine=engine)
+    seconds = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "file": os.path.basename(path),
+        "engine": engine,
+        "rows": stats.total_rows,
+        "valid_rows": stats.valid_rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": int(stats.total_rows / seconds) if seconds else None,
+        "peak_mb": round(peak / 2**20, 1) if peak is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--kinds", nargs="+", choices=["csv", "xlsx"], default=["csv", "xlsx"])
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "bench_import"))
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory tracking")
+    args = parser.parse_args()
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    results = []
+    print(f"{'file':<24}{'engine':<10}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MB':>10}")
+    for kind in args.kinds:
+        for rows in args.rows:
+            path = fixture(args.fixtures_dir, kind, rows)
+            for engine in available_engines(kind):
+                r = run_one(path, engine, trace_memory=not args.no_memory)
+                results.append(r)
+                print(f"{r['file']:<24}{engine:<10}{r['rows']:>10}{r['seconds']:>10}{r['rows_per_sec']:>12}{str(r['peak_mb']):>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
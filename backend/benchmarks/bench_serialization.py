@@ -0,0 +1,110 @@
+"""
+Response serialization benchmark: the list/status endpoints with and
+without FAST_JSON_RESPONSES, on the same data, in-process.
+
+    cd backend
+    python -m benchmarks.bench_serialization                     # 20k rows, 5000-row pages
+    python -m benchmarks.bench_serialization --rows 50000 --requests 30 --json ser.json
+
+Per endpoint it reports p50/p95 latency for both paths, the SQL time
+(from Server-Timing) so the non-DB share is visible, and the speedup.
+Both paths must return the same JSON; the run fails otherwise. The
+status endpoint is measured cold (cache version bumped before each call).
+"""
+import argparse
+import json
+import time
+import uuid
+from typing import Dict, List
+
+from benchmarks.bench_e2e import configure_environment, percentile, seed_campaign
+
+
+def server_timing_ms(response) -> float:
+    # 'db;dur=12.3;desc="4 queries"'
+    for part in response.headers.get("server-timing", "").split(";"):
+        if part.startswith("dur="):
+            return float(part[4:])
+    return 0.0
+
+
+def measure(client, path: str, requests: int, before=None) -> Dict:
+    latencies: List[float] = []
+    db_ms: List[float] = []
+    body = None
+    for _ in range(requests):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit(f"GET {path} -> {response.status_code}: {response.text[:200]}")
+        db_ms.append(server_timing_ms(response))
+        body = response.content
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "db_p50_ms": round(percentile(sorted(db_ms), 50), 2),
+        "bytes": len(body),
+        "_body": body,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="contacts/emails to seed")
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20, help="requests per endpoint and path")
+    parser.add_argument("--events-per-email", type=int, default=2)
+    parser.add_argument("--database-url")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.db import Base, engine
+    from app.main import app
+    from app.models import EmailStatus
+    from app.services.campaign_cache import bump_campaign_version
+
+    Base.metadata.create_all(engine)
+    campaign_id = seed_campaign(uuid.uuid4().hex[:8], args.rows, EmailStatus.sent, args.events_per_email)
+    client = TestClient(app)
+
+    limit = args.page_size
+    endpoints = [
+        ("list_contacts", f"/api/contacts?campaign_id={campaign_id}&limit={limit}", None),
+        ("list_emails", f"/api/emails/?campaign_id={campaign_id}&limit={limit}", None),
+        ("campaign_status", f"/api/campaigns/{campaign_id}?limit={limit}", lambda: bump_campaign_version(campaign_id)),
+    ]
+
+    results = []
+    print(f"{'endpoint':<18}{'path':>9}{'p50 ms':>10}{'p95 ms':>10}{'db ms':>9}{'KB':>9}")
+    for name, path, before in endpoints:
+        row = {"endpoint": name, "rows": min(args.rows, limit)}
+        for mode, fast in (("standard", False), ("fast", True)):
+            settings.FAST_JSON_RESPONSES = fast
+            measure(client, path, 2, before)  # warm-up
+            row[mode] = measure(client, path, args.requests, before)
+            r = row[mode]
+            print(f"{name:<18}{mode:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['db_p50_ms']:>9}{r['bytes'] // 1024:>9}")
+        if json.loads(row["standard"].pop("_body")) != json.loads(row["fast"].pop("_body")):
+            raise SystemExit(f"{name}: fast path returned different JSON")
+        row["speedup_p50"] = round(row["standard"]["p50_ms"] / row["fast"]["p50_ms"], 2)
+        non_db = [row[m]["p50_ms"] - row[m]["db_p50_ms"] for m in ("standard", "fast")]
+        row["non_db_speedup_p50"] = round(non_db[0] / non_db[1], 2) if non_db[1] > 0 else None
+        results.append(row)
+
+    print()
+    for row in results:
+        print(f"{row['endpoint']:<18} speedup x{row['speedup_p50']} (outside SQL: x{row['non_db_speedup_p50']})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "page_size": limit, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Worker cold-start budget: import app.main in fresh interpreters and fail
+(exit 1) if startup is slow or has side effects.
+
+    cd backend
+    python -m benchmarks.bench_startup                 # median must be <= 1500 ms
+    python -m benchmarks.bench_startup --budget-ms 800 --runs 10 --json startup.json
+
+Each run imports the app with no provider credentials and a DATABASE_URL
+pointing at a closed port, so any network or DB access at import time
+shows up as a failure. Modules that must stay deferred until first use
+(langchain, SendGrid, pandas, pyarrow) are checked too.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFERRED_MODULES = ["langchain", "langchain_groq", "langgraph", "sendgrid", "pandas", "pyarrow", "openpyxl"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def run_once() -> dict:
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("SENDGRID_", "GROQ_", "DATABASE_"))}
+    env["DATABASE_URL"] = "postgresql+psycopg://nobody@127.0.0.1:9/unreachable"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Run outside backend/ so a local .env cannot supply credentials
+    env["PYTHONPATH"] = backend_dir + os.pathsep + env.get("PYTHONPATH", "")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=os.path.dirname(backend_dir),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode != 0:
+        raise SystemExit(f"importing app.main failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    times_ms = sorted(r["seconds"] * 1000 for r in runs)
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    report = {
+        "runs": args.runs,
+        "median_ms": round(statistics.median(times_ms), 1),
+        "min_ms": round(times_ms[0], 1),
+        "max_ms": round(times_ms[-1], 1),
+        "budget_ms": args.budget_ms,
+        "eagerly_loaded": loaded,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if report["median_ms"] > args.budget_ms:
+        failures.append(f"median import time {report['median_ms']} ms exceeds budget {args.budget_ms} ms")
+    if loaded:
+        failures.append(f"modules imported at startup instead of on first use: {', '.join(loaded)}")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
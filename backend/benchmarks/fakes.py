@@ -0,0 +1,100 @@
+"""
+Offline stand-ins for Groq and SendGrid with configurable latency.
+
+FakeChatGroq answers the prompts the app actually sends: it emits the
+tool call the agent is told to make, a short final message after a tool
+result, and a JSON subject/body for the generation prompt, with
+usage_metadata approximating token counts. FakeSendGridClient
+returns a 202 with an X-Message-Id. Both sleep `latency_s` (± jitter) per
+call, like a network round trip.
+"""
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_TOOL_REQUEST_RE = re.compile(r"Use (\w+) with contact_id=(\d+) and step_id=(\d+)")
+
+
+def _sleep(latency_s: float, jitter: float) -> None:
+    if latency_s > 0:
+        time.sleep(latency_s * random.uniform(1 - jitter, 1 + jitter))
+
+
+class FakeChatGroq(BaseChatModel):
+    latency_s: float = 0.05
+    jitter: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=str(last.content))
+        text = str(last.content)
+        match = _TOOL_REQUEST_RE.search(text)
+        if match:
+            name, contact_id, step_id = match.groups()
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": name,
+                    "args": {"contact_id": int(contact_id), "step_id": int(step_id)},
+                    "id": "call_" + uuid.uuid4().hex[:12],
+                }],
+            )
+        # The generation rules (with the JSON field names) sit in the system message
+        if any('"subject"' in str(m.content) for m in messages):
+            content = json.dumps({
+                "subject": "Quick question",
+                "body": "I thought our product might help your team. Open to a short call next week?",
+            })
+        else:
+            content = "Thanks for the note, happy to help."
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": len(content) // 4,
+            "total_tokens": (prompt_chars + len(content)) // 4,
+        })
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        _sleep(self.latency_s, self.jitter)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+class _FakeResponse:
+    status_code = 202
+
+    def __init__(self):
+        self.headers = {"X-Message-Id": uuid.uuid4().hex}
+        self.body = b""
+
+
+class FakeSendGridClient:
+    def __init__(self, latency_s: float = 0.02, jitter: float = 0.2):
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.sent = 0
+
+    def send(self, message):
+        _sleep(self.latency_s, self.jitter)
+        self.sent += 1
+        return _FakeResponse()
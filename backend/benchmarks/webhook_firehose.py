@@ -0,0 +1,244 @@
+"""
+SendGrid event firehose: replay realistic event webhook batches against
+/api/webhooks/sendgrid-events at a target rate and report sustained
+events/sec, error rate, latency and database growth.
+
+    cd backend
+    # against a running server whose DB has sent emails with ids 1..5000
+    python -m benchmarks.webhook_firehose --url http://localhost:8000 \\
+        --email-ids 1-5000 --rate 2000 --duration 60 \\
+        --database-url postgresql+psycopg://user:pw@localhost/email_app
+    # fully offline: in-process app on a throwaway SQLite DB
+    python -m benchmarks.webhook_firehose --in-process --rate 1000 --duration 20
+
+Batches look like SendGrid's: mixed event types (including ones the app
+ignores, such as processed/deferred), a share of duplicate deliveries of the
+same sg_event_id, and events without the email_instance_id custom arg.
+--database-url (implied with --in-process) enables the DB growth report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from benchmarks.bench_e2e import percentile
+
+WEBHOOK_PATH = "/api/webhooks/sendgrid-events"
+
+# Rough shape of a real campaign's event stream
+DEFAULT_MIX = "processed=0.10,delivered=0.25,open=0.38,click=0.15,deferred=0.04,bounce=0.03,spam=0.01,unsubscribe=0.02,dropped=0.02"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def parse_id_range(spec: str) -> List[int]:
+    start, _, end = spec.partition("-")
+    return list(range(int(start), int(end or start) + 1))
+
+
+class EventFactory:
+    def __init__(self, email_ids: List[int], mix: Dict[str, float], duplicate_rate: float, missing_args_rate: float):
+        self.email_ids = email_ids
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.duplicate_rate = duplicate_rate
+        self.missing_args_rate = missing_args_rate
+        self._recent: List[dict] = []
+
+    def event(self) -> dict:
+        if self._recent and random.random() < self.duplicate_rate:
+            # SendGrid retries deliver the same event (same sg_event_id) again
+            return dict(random.choice(self._recent))
+        email_id = random.choice(self.email_ids)
+        ev = {
+            "email": f"recipient{email_id}@example.com",
+            "timestamp": int(time.time()),
+            "event": random.choices(self.kinds, self.weights)[0],
+            "sg_event_id": uuid.uuid4().hex,
+            "sg_message_id": f"msg{email_id}.filter0001",
+        }
+        if random.random() >= self.missing_args_rate:
+            ev["email_instance_id"] = str(email_id)  # custom args arrive as strings
+        if ev["event"] == "click":
+            ev["url"] = "https://example.com/pricing"
+        if ev["event"] in ("open", "click"):
+            ev["useragent"] = "Mozilla/5.0"
+            ev["ip"] = "203.0.113.7"
+        if len(self._recent) < 1000:
+            self._recent.append(ev)
+        else:
+            self._recent[random.randrange(1000)] = ev
+        return ev
+
+    def batch(self, size: int) -> List[dict]:
+        return [self.event() for _ in range(size)]
+
+
+class DatabaseProbe:
+    """email_events row count and on-disk size, read straight from the DB."""
+
+    def __init__(self, url: str):
+        from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
+
+        self.url = make_url(url)
+        self.engine = create_engine(url.replace("+aiosqlite", ""))
+
+    def snapshot(self) -> Dict[str, Optional[int]]:
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("SELECT count(*) FROM email_events")).scalar()
+            size = None
+            if self.engine.dialect.name == "postgresql":
+                size = conn.execute(text("SELECT pg_total_relation_size('email_events')")).scalar()
+        if self.engine.dialect.name == "sqlite" and self.url.database:
+            size = os.path.getsize(self.url.database)
+        return {"email_events_rows": rows, "bytes": size}
+
+
+async def run_load(client, factory: EventFactory, args) -> Dict:
+    latencies: List[float] = []
+    per_second: Dict[int, int] = {}
+    sent_events = 0
+    accepted_events = 0
+    errors = 0
+    status_counts: Dict[str, int] = {}
+
+    interval = args.batch_size / args.rate  # seconds between batch slots
+    total_batches = int(args.duration / interval)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+
+    async def send(slot: int):
+        nonlocal sent_events, accepted_events, errors
+        delay = started + slot * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with semaphore:
+            batch = factory.batch(args.batch_size)
+            t0 = time.perf_counter()
+            try:
+                response = await client.post(WEBHOOK_PATH, json=batch)
+                status = str(response.status_code)
+                ok = response.status_code < 400
+            except Exception as exc:  # connection refused, timeouts, ...
+                status = type(exc).__name__
+                ok = False
+            latencies.append(time.perf_counter() - t0)
+            status_counts[status] = status_counts.get(status, 0) + 1
+            sent_events += len(batch)
+            if ok:
+                accepted_events += len(batch)
+                second = int(time.perf_counter() - started)
+                per_second[second] = per_second.get(second, 0) + len(batch)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(send(slot) for slot in range(total_batches)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "target_events_per_sec": args.rate,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": len(latencies),
+        "events_sent": sent_events,
+        "events_accepted": accepted_events,
+        "sustained_events_per_sec": round(accepted_events / elapsed, 1) if elapsed else None,
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "status_codes": status_counts,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "events_per_second_timeline": [per_second.get(s, 0) for s in range(int(elapsed) + 1)],
+    }
+
+
+def in_process_target(args):
+    """Seed a throwaway SQLite DB and return (httpx transport, base url, email ids, DB url)."""
+    import httpx
+    from benchmarks.bench_e2e import configure_environment, seed_campaign
+
+    args.database_url = None
+    configure_environment(args)
+    from app.db import Base, SessionLocal, engine
+    from app.main import app
+    from app.models import EmailInstance, EmailStatus
+
+    Base.metadata.create_all(engine)
+    campaign_id = seed_campaign(uuid.uuid4().hex[:8], args.seed_emails, EmailStatus.sent)
+    db = SessionLocal()
+    email_ids = [i for (i,) in db.query(EmailInstance.id).filter(EmailInstance.campaign_id == campaign_id)]
+    db.close()
+    return httpx.ASGITransport(app=app), "http://firehose.local", email_ids, os.environ["DATABASE_URL"]
+
+
+async def main_async(args) -> Dict:
+    import httpx
+
+    if args.in_process:
+        transport, base_url, email_ids, database_url = in_process_target(args)
+    else:
+        if not args.email_ids:
+            raise SystemExit("--email-ids is required against a remote server (e.g. --email-ids 1-5000)")
+        transport, base_url, email_ids, database_url = None, args.url, parse_id_range(args.email_ids), args.database_url
+
+    factory = EventFactory(email_ids, parse_mix(args.mix), args.duplicate_rate, args.missing_args_rate)
+    probe = DatabaseProbe(database_url) if database_url else None
+    before = probe.snapshot() if probe else None
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=args.timeout) as client:
+        report = await run_load(client, factory, args)
+
+    if probe:
+        after = probe.snapshot()
+        report["db"] = {
+            "before": before,
+            "after": after,
+            "email_events_added": after["email_events_rows"] - before["email_events_rows"],
+            "bytes_added": (after["bytes"] - before["bytes"]) if after["bytes"] is not None else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="run the app in-process on a throwaway SQLite DB")
+    parser.add_argument("--seed-emails", type=int, default=5000, help="sent emails to seed with --in-process")
+    parser.add_argument("--email-ids", help="id range of existing email_instances, e.g. 1-5000")
+    parser.add_argument("--database-url", help="read email_events growth from this DB")
+    parser.add_argument("--rate", type=float, default=1000, help="target events per second")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--batch-size", type=int, default=500, help="events per POST (SendGrid sends up to ~1000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="max in-flight requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="event=weight,... ")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--missing-args-rate", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    summary = {k: v for k, v in report.items() if k != "events_per_second_timeline"}
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
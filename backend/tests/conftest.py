@@ -0,0 +1,59 @@
+import os
+import re
+import tempfile
+import uuid
+
+# Settings load at import time: configure the environment before anything under app/.
+_TMP = tempfile.mkdtemp(prefix="email_app_tests_")
+os.environ.update(
+    DATABASE_URL="sqlite:///" + os.path.join(_TMP, "test.db"),
+    SENDGRID_API_KEY="test",
+    SENDGRID_FROM_EMAIL="test@example.com",
+    GROQ_API_KEY="test",
+    IMPORT_STAGING_DIR=os.path.join(_TMP, "imports"),
+    # Budget/N+1 violations turn responses into 500s
+    DB_QUERY_BUDGET_STRICT="true",
+    WARM_IMPORTS_ON_STARTUP="false",
+)
+for key in ("DATABASE_READ_URL", "DATABASE_ASYNC_URL", "CACHE_URL"):
+    os.environ.pop(key, None)
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from benchmarks.fakes import FakeChatGroq, FakeSendGridClient
+
+_REPLY_REQUEST_RE = re.compile(r"Original email id: (\d+)\nIncoming reply text: (.*)")
+
+
+class FakeReplyAgentGroq(FakeChatGroq):
+    """FakeChatGroq that also walks the /webhooks/reply flow: classify, then draft."""
+
+    def _reply(self, messages):
+        last = messages[-1]
+        match = _REPLY_REQUEST_RE.search(str(last.content)) if isinstance(last, HumanMessage) else None
+        if not match:
+            return super()._reply(messages)
+        args = {"original_email_id": int(match.group(1)), "incoming_text": match.group(2)}
+        return AIMessage(content="", tool_calls=[
+            {"name": "classify_reply_tool", "args": args, "id": "call_" + uuid.uuid4().hex[:12]},
+            {"name": "draft_reply_tool", "args": {**args, "goal": "answer"}, "id": "call_" + uuid.uuid4().hex[:12]},
+        ])
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.db import Base, engine
+    from app.main import app
+    from app.services import agent, email_service
+
+    Base.metadata.create_all(engine)
+    agent.ChatGroq = lambda **kwargs: FakeReplyAgentGroq(latency_s=0)
+    email_service._sg_client = FakeSendGridClient(latency_s=0)
+    return TestClient(app)
+
+
+@pytest.fixture
+def run_id() -> str:
+    return uuid.uuid4().hex[:8]
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.deps import DEFAULT_PAGE_SIZE
+from app.models import EmailInstance, EmailStatus
+from app.services.campaign_cache import bump_campaign_version, get_cache_backend, summary_cache_key
+from benchmarks.bench_e2e import seed_campaign
+
+
+def lagging_replica(monkeypatch):
+    """Point the status route at a snapshot of the primary taken now."""
+    from app.routers import campaigns
+
+    path = os.path.join(tempfile.mkdtemp(), "replica.db")
+    shutil.copyfile(engine.url.database, path)
+    replica = create_engine("sqlite:///" + path)
+    monkeypatch.setattr(campaigns, "read_engine", replica)
+    monkeypatch.setattr(campaigns, "ReadSessionLocal", sessionmaker(bind=replica))
+
+
+def send_all(campaign_id: int) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(EmailInstance).where(EmailInstance.campaign_id == campaign_id).values(status=EmailStatus.sent)
+        )
+        db.commit()
+    bump_campaign_version(campaign_id)
+
+
+def cached(campaign_id: int):
+    return get_cache_backend().get(summary_cache_key(campaign_id, DEFAULT_PAGE_SIZE, None))
+
+
+def test_lagging_replica_summary_is_not_cached(client, run_id, monkeypatch):
+    campaign_id = seed_campaign(run_id, 3, EmailStatus.draft)
+    lagging_replica(monkeypatch)
+    send_all(campaign_id)
+
+    # Served from the replica, which has not replayed the send yet
+    response = client.get(f"/api/campaigns/{campaign_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["sent"] == 0
+    assert cached(campaign_id) is None
+
+    # Once the replica catches up, the current counts are served
+    monkeypatch.undo()
+    response = client.get(f"/api/campaigns/{campaign_id}")
+    assert response.json()["sent"] == 3
+
+
+def test_replica_summary_is_cached_once_settled(client, run_id, monkeypatch):
+    campaign_id = seed_campaign(run_id, 3, EmailStatus.draft)
+    send_all(campaign_id)
+    lagging_replica(monkeypatch)
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0)
+
+    response = client.get(f"/api/campaigns/{campaign_id}")
+    assert response.json()["sent"] == 3
+    assert cached(campaign_id) is not None
+    again = client.get(f"/api/campaigns/{campaign_id}", headers={"If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,81 @@
+import asyncio
+import io
+
+import pytest
+
+
+def upload(client, data: bytes, filename: str = "contacts.csv"):
+    return client.post("/api/upload-contacts", files={"file": (filename, io.BytesIO(data), "text/csv")})
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "pandas"])
+@pytest.mark.parametrize("data, detail", [
+    (b"", "empty"),
+    (b"name,company\n", "renamed to 'email'"),
+    (b"name,company", "renamed to 'email'"),
+    (b"email,name\n", "No valid contacts"),
+    (b"email,name\nnot-an-address,Ann\n,Bob\n", "No valid contacts"),
+])
+def test_upload_rejects_files_without_valid_contacts(client, monkeypatch, engine, data, detail):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "SPREADSHEET_ENGINE", engine)
+    response = upload(client, data)
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+
+
+def test_bulk_upsert_writes_each_batch_as_it_arrives(client, run_id):
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db import ASYNC_DATABASE_URL
+    from app.models import CampaignContact, Contact
+    from app.services.contacts_import import bulk_upsert_contacts
+    from benchmarks.bench_e2e import seed_campaign
+
+    campaign_id = seed_campaign(run_id, 1)
+    emails = [f"upsert{run_id}-{i}@example.com" for i in range(3)]
+    written_before_second_batch = []
+
+    async def run():
+        # Own unpooled engine: the app's pooled connections belong to the test client's loop
+        engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        async with async_sessionmaker(engine)() as db:
+            async def batches():
+                yield [{"email": emails[0], "first_name": "First"}, {"email": emails[1]}]
+                written_before_second_batch.append(
+                    await db.scalar(select(func.count()).where(Contact.email.in_(emails)))
+                )
+                # A repeat from an earlier batch does not overwrite the first occurrence
+                yield [{"email": emails[0], "first_name": "Repeat"}, {"email": emails[2]}]
+
+            linked = await bulk_upsert_contacts(db, campaign_id, batches())
+            first_name = await db.scalar(select(Contact.first_name).where(Contact.email == emails[0]))
+            members = await db.scalar(
+                select(func.count()).where(CampaignContact.campaign_id == campaign_id)
+            )
+            await db.rollback()
+        await engine.dispose()
+        return linked, first_name, members
+
+    linked, first_name, members = asyncio.run(run())
+    assert written_before_second_batch == [2]
+    assert (linked, first_name, members) == (3, "First", 4)
+
+
+def test_bulk_upsert_rejects_unsupported_dialects():
+    from types import SimpleNamespace
+
+    from app.services.contacts_import import bulk_upsert_contacts
+
+    class MySQLSession:
+        async def connection(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+
+    async def batches():
+        yield [{"email": "someone@example.com"}]
+
+    with pytest.raises(NotImplementedError, match="not mysql"):
+        asyncio.run(bulk_upsert_contacts(MySQLSession(), 1, batches()))
@@ -0,0 +1,27 @@
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import EmailInstance, EmailStatus
+from benchmarks.bench_e2e import seed_campaign
+
+
+def statuses(campaign_id: int):
+    with SessionLocal() as db:
+        return sorted(db.scalars(
+            select(EmailInstance.status).where(EmailInstance.campaign_id == campaign_id)
+        ))
+
+
+def test_bulk_approved_emails_are_sent(client, run_id):
+    campaign_id = seed_campaign(run_id, 3, EmailStatus.draft)
+    response = client.post("/api/emails/bulk-update", json={
+        "filter": {"campaign_id": campaign_id},
+        "status": EmailStatus.queued.value,
+    })
+    assert response.json()["updated"] == 3
+    assert statuses(campaign_id) == [EmailStatus.queued] * 3
+
+    response = client.post(f"/api/emails/send?campaign_id={campaign_id}", json={"step_number": 1})
+    assert response.status_code == 200, response.text
+    assert response.json() == 3
+    assert statuses(campaign_id) == [EmailStatus.sent] * 3
@@ -0,0 +1,80 @@
+from langchain_core.messages import AIMessage
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import Campaign, EmailInstance
+from benchmarks.bench_e2e import seed_campaign
+from benchmarks.fakes import FakeChatGroq
+
+
+class NotJSONGroq(FakeChatGroq):
+    """Drives the agent as usual, but answers the generation prompt with prose."""
+
+    def _reply(self, messages):
+        reply = super()._reply(messages)
+        if '"subject"' in str(reply.content):
+            return AIMessage(content="Sorry, I can't help with that.")
+        return reply
+
+
+class SummarizingGroq(FakeChatGroq):
+    """Answers the product summary prompt with the description's first word."""
+
+    def _reply(self, messages):
+        text = str(messages[-1].content)
+        if text.startswith("Condense this product description"):
+            return AIMessage(content="Summary of " + text.split("\n\n", 1)[1].split()[0])
+        return super()._reply(messages)
+
+
+def drafts(campaign_id: int):
+    with SessionLocal() as db:
+        return db.execute(
+            select(EmailInstance.id, EmailInstance.input_fingerprint).where(EmailInstance.campaign_id == campaign_id)
+        ).all()
+
+
+def test_template_fallback_drafts_are_regenerated(client, run_id, monkeypatch):
+    from app.services import agent
+
+    campaign_id = seed_campaign(run_id, 2)
+    with monkeypatch.context() as m:
+        m.setattr(agent, "ChatGroq", lambda **kwargs: NotJSONGroq(latency_s=0))
+        m.setattr(agent._llm, "_models", {})  # ResilientLLM caches model instances
+        assert client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={}).status_code == 200
+    # Unparseable model output falls back to the template: no fingerprint
+    assert [fp for _, fp in drafts(campaign_id)] == [None, None]
+
+    response = client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={"regenerate": True})
+    assert response.status_code == 200, response.text
+    regenerated = drafts(campaign_id)
+    assert len(regenerated) == 2
+    assert all(fp is not None for _, fp in regenerated)
+
+
+def test_product_summary_follows_description_edits(client, run_id, monkeypatch):
+    from app.services import agent
+
+    def set_description(word: str) -> None:
+        with SessionLocal() as db:
+            db.get(Campaign, campaign_id).product_description = " ".join([word] + ["details"] * 400)
+            db.commit()
+
+    def product_summary() -> str:
+        with SessionLocal() as db:
+            return db.get(Campaign, campaign_id).product_summary
+
+    campaign_id = seed_campaign(run_id, 2)
+    monkeypatch.setattr(agent, "ChatGroq", lambda **kwargs: SummarizingGroq(latency_s=0))
+    monkeypatch.setattr(agent._llm, "_models", {})
+
+    set_description("Alpha")
+    assert client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={}).status_code == 200
+    assert product_summary() == "Summary of Alpha"
+    first = dict(drafts(campaign_id))
+
+    set_description("Beta")
+    response = client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={"regenerate": True})
+    assert response.status_code == 200, response.text
+    assert product_summary() == "Summary of Beta"
+    assert all(fp != first.get(email_id) for email_id, fp in drafts(campaign_id))
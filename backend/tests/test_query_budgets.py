@@ -0,0 +1,178 @@
+"""
+One request per budgeted route (QUERY_BUDGETS), checked with
+assert_query_budget. DB_QUERY_BUDGET_STRICT is on (conftest), so an N+1
+on any route, budgeted or not, also fails the request with a 500.
+Streamed routes are checked when their body ends, by raising
+QueryBudgetExceeded.
+"""
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app.config import settings
+from app.models import EmailInstance, EmailStatus
+from app.services.query_stats import (
+    QUERY_BUDGETS,
+    QUERY_COUNT_HEADER,
+    REPEATS_ALLOWED,
+    QueryBudgetExceeded,
+    assert_query_budget,
+    route_key,
+)
+from benchmarks.bench_e2e import contacts_csv, seed_campaign
+
+ROWS = 30
+
+
+def email_ids(campaign_id: int):
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        return list(db.scalars(
+            select(EmailInstance.id).where(EmailInstance.campaign_id == campaign_id).order_by(EmailInstance.id)
+        ))
+
+
+def check(response, route: str) -> None:
+    assert response.status_code == 200, response.text
+    assert_query_budget(response, route=route)
+
+
+def check_streamed(response) -> None:
+    # Reaching here means the whole body streamed within budget
+    assert response.status_code == 200, response.text
+    assert QUERY_COUNT_HEADER not in response.headers
+
+
+def test_budget_tables_name_real_routes(client):
+    routes = {
+        route_key(method.upper(), path)
+        for path, operations in client.app.openapi()["paths"].items()
+        for method in operations
+    }
+    assert set(QUERY_BUDGETS) <= routes, set(QUERY_BUDGETS) - routes
+    assert REPEATS_ALLOWED <= routes, REPEATS_ALLOWED - routes
+
+
+def test_middleware_enforces_budgets(client, run_id, monkeypatch):
+    # The middleware's route key must match the table, or no budget applies
+    monkeypatch.setitem(QUERY_BUDGETS, "GET /contacts", 0)
+    campaign_id = seed_campaign(run_id, 1)
+    response = client.get(f"/api/contacts?campaign_id={campaign_id}")
+    assert response.status_code == 500
+    assert "budget 0" in response.text
+
+
+def test_streamed_queries_count_toward_the_budget(client, run_id, monkeypatch):
+    # One query before the response starts; the export's SELECT runs in the body
+    monkeypatch.setitem(QUERY_BUDGETS, "GET /campaigns/{campaign_id}/export", 1)
+    campaign_id = seed_campaign(run_id, 1, EmailStatus.sent)
+    with pytest.raises(QueryBudgetExceeded, match="budget 1"):
+        client.get(f"/api/campaigns/{campaign_id}/export")
+
+
+def test_campaign_status(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.sent, events_per_email=2)
+    check(client.get(f"/api/campaigns/{campaign_id}"), "GET /campaigns/{campaign_id}")
+
+
+def test_campaign_events(client, run_id, monkeypatch):
+    from app.routers import campaigns
+    from app.services.campaign_events import format_sse
+
+    # The real stream never ends; the queries all run before the snapshot is sent
+    async def snapshot_only(hub, sub, snapshot, is_disconnected):
+        hub.unsubscribe(sub)
+        yield format_sse("snapshot", snapshot)
+
+    monkeypatch.setattr(campaigns, "campaign_event_stream", snapshot_only)
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.sent)
+    response = client.get(f"/api/campaigns/{campaign_id}/events")
+    check_streamed(response)
+    assert response.text.startswith("event: snapshot")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_campaign_export(client, run_id, fmt):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.sent, events_per_email=2)
+    check_streamed(client.get(f"/api/campaigns/{campaign_id}/export?format={fmt}"))
+
+
+def test_generate_emails_repeats_allowed(client, run_id):
+    # One LLM round per contact by design: in REPEATS_ALLOWED, so not an N+1 in strict mode
+    contacts = settings.DB_REPEATED_STATEMENT_THRESHOLD + 2
+    campaign_id = seed_campaign(run_id, contacts)
+    response = client.post(f"/api/campaigns/{campaign_id}/generate-emails", json={})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == contacts
+
+
+def test_list_emails(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.draft)
+    check(client.get(f"/api/emails/?campaign_id={campaign_id}"), "GET /emails/")
+
+
+def test_update_email(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.draft)
+    email_id = email_ids(campaign_id)[0]
+    check(client.put(f"/api/emails/{email_id}", json={"subject": "Edited"}), "PUT /emails/{email_id}")
+
+
+def test_bulk_update_emails(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.draft)
+    response = client.post("/api/emails/bulk-update", json={
+        "filter": {"campaign_id": campaign_id},
+        "status": EmailStatus.queued.value,
+    })
+    check(response, "POST /emails/bulk-update")
+    assert response.json()["updated"] == ROWS
+
+
+def test_send_emails(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.draft)
+    response = client.post(f"/api/emails/send?campaign_id={campaign_id}", json={"step_number": 1})
+    check(response, "POST /emails/send")
+    assert response.json() == ROWS
+
+
+def test_list_contacts(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS)
+    check(client.get(f"/api/contacts?campaign_id={campaign_id}"), "GET /contacts")
+
+
+def test_upload_and_confirm_contacts(client, run_id):
+    data = contacts_csv(run_id, ROWS)
+    response = client.post("/api/upload-contacts", files={"file": ("contacts.csv", io.BytesIO(data), "text/csv")})
+    check(response, "POST /upload-contacts")
+
+    response = client.post("/api/contacts/confirm", json={
+        "campaign_name": f"test {run_id}",
+        "product_name": "Test",
+        "product_description": "Test product",
+        "import_id": response.json()["import_id"],
+    })
+    check(response, "POST /contacts/confirm")
+
+
+def test_sendgrid_events(client, run_id):
+    campaign_id = seed_campaign(run_id, ROWS, EmailStatus.sent)
+    events = []
+    for email_id in email_ids(campaign_id):
+        events += [
+            {"event": "delivered", "email_instance_id": email_id},
+            {"event": "open", "email_instance_id": email_id},
+        ]
+    events.append({"event": "bounce", "email_instance_id": email_id, "email": f"bounce-{run_id}@example.com"})
+    check(client.post("/api/webhooks/sendgrid-events", json=events), "POST /webhooks/sendgrid-events")
+
+
+def test_reply(client, run_id):
+    campaign_id = seed_campaign(run_id, 1, EmailStatus.sent)
+    response = client.post("/api/webhooks/reply", json={
+        "original_email_id": email_ids(campaign_id)[0],
+        "incoming_text": "What does it cost?",
+        "from_email": "someone@example.com",
+    })
+    check(response, "POST /webhooks/reply")
+    assert len(email_ids(campaign_id)) == 2  # the drafted reply
@@ -0,0 +1,24 @@
+from sqlalchemy import select
+
+from app.db import SessionLocal
+from app.models import EmailEvent, EmailInstance, EmailStatus
+from benchmarks.bench_e2e import seed_campaign
+
+
+def test_malformed_events_are_skipped_not_fatal(client, run_id):
+    campaign_id = seed_campaign(run_id, 1, EmailStatus.sent)
+    with SessionLocal() as db:
+        email_id = db.scalar(select(EmailInstance.id).where(EmailInstance.campaign_id == campaign_id))
+
+    response = client.post("/api/webhooks/sendgrid-events", json=[
+        {"event": "open", "custom_args": None},
+        {"event": "open", "custom_args": "not-an-object"},
+        {"event": "open", "email_instance_id": "abc"},
+        {"event": "open", "custom_args": {"email_instance_id": [email_id]}},
+        {"event": "delivered", "custom_args": {"email_instance_id": str(email_id)}},
+    ])
+    assert response.status_code == 200, response.text
+
+    with SessionLocal() as db:
+        assert db.get(EmailInstance, email_id).status == EmailStatus.delivered
+        assert db.scalar(select(EmailEvent.id).where(EmailEvent.email_id == email_id)) is not None
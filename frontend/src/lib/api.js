@@ -2,6 +2,21 @@ import axios from "axios";
 
 const BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000/api";
 
+// Send the backend's read-your-writes cookie so reads after a write hit the primary DB.
+axios.defaults.withCredentials = true;
+
+// List endpoints are keyset-paginated; follow X-Next-Cursor until exhausted.
+async function fetchAllPages(url, params) {
+  const items = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(url, { params: cursor ? { ...params, cursor } : params });
+    items.push(...res.data);
+    cursor = res.headers["x-next-cursor"] || null;
+  } while (cursor);
+  return items;
+}
+
 export async function uploadContacts(file) {
   const form = new FormData();
   form.append("file", file);
@@ -28,8 +43,7 @@ export async function listEmails(campaignId, status) {
   try {
     const params = { campaign_id: campaignId };
     if (status) params.status = status;
-    const res = await axios.get(`${BASE_URL}/emails/`, { params });
-    return res.data;
+    return await fetchAllPages(`${BASE_URL}/emails/`, params);
   } catch (err) {
     throw new Error(err.response?.data?.detail || err.response?.data || err.message);
   }
@@ -57,19 +71,48 @@ export async function sendEmails(campaignId, stepNumber) {
   }
 }
 
+// The summary pages its sent_emails list with next_cursor; follow it like fetchAllPages.
 export async function getCampaignStatus(campaignId) {
   try {
-    const res = await axios.get(`${BASE_URL}/campaigns/${campaignId}`);
-    return res.data;
+    const url = `${BASE_URL}/campaigns/${campaignId}`;
+    const summary = (await axios.get(url)).data;
+    let cursor = summary.next_cursor;
+    while (cursor) {
+      const page = (await axios.get(url, { params: { cursor } })).data;
+      summary.sent_emails.push(...page.sent_emails);
+      cursor = page.next_cursor;
+    }
+    summary.next_cursor = null;
+    return summary;
   } catch (err) {
     throw new Error(err.response?.data?.detail || err.response?.data || err.message);
   }
 }
 
-export async function listContacts() {
+// Live status over server-sent events: `snapshot` counts, then `delta` patches;
+// on `resync` (or a rejected connection) refetch getCampaignStatus and
+// reconnect. Returns a function that closes the stream.
+export function subscribeCampaignEvents(campaignId, { onSnapshot, onDelta, onResync }) {
+  const source = new EventSource(`${BASE_URL}/campaigns/${campaignId}/events`, {
+    withCredentials: true,
+  });
+  source.addEventListener("snapshot", (e) => onSnapshot(JSON.parse(e.data)));
+  source.addEventListener("delta", (e) => onDelta(JSON.parse(e.data)));
+  source.addEventListener("resync", () => {
+    source.close();
+    onResync();
+  });
+  source.onerror = () => {
+    // EventSource retries dropped connections itself; a closed one (e.g. 503) needs a resync
+    if (source.readyState === EventSource.CLOSED) onResync();
+  };
+  return () => source.close();
+}
+
+export async function listContacts(campaignId) {
   try {
-    const res = await axios.get(`${BASE_URL}/contacts`);
-    return res.data;
+    const params = campaignId ? { campaign_id: campaignId } : {};
+    return await fetchAllPages(`${BASE_URL}/contacts`, params);
   } catch (err) {
     throw new Error(err.response?.data?.detail || err.response?.data || err.message);
   }
@@ -32,16 +32,17 @@ export default function GeneratePage() {
   }, []);
 
   useEffect(() => {
+    if (!campaignId) return;
     const fetchContacts = async () => {
       try {
-        const data = await listContacts();
+        const data = await listContacts(campaignId);
         setContacts(data);
       } catch (err) {
         console.error(err);
       }
     };
     fetchContacts();
-  }, []);
+  }, [campaignId]);
 
   const refreshEmails = async () => {
     if (!campaignId) return;
@@ -28,8 +28,13 @@ export default function PreviewPage() {
         campaign_name: meta.campaign_name,
         product_name: meta.product_name,
         product_description: meta.product_description,
-        contacts: rows,
       };
+      // The server staged the whole file at upload; only fall back to posting rows without it.
+      if (meta.import_id) {
+        payload.import_id = meta.import_id;
+      } else {
+        payload.contacts = rows;
+      }
       const res = await confirmContacts(payload);
       sessionStorage.setItem("campaign-id", String(res.id));
       navigate("/generate");
@@ -52,6 +57,12 @@ export default function PreviewPage() {
         <p className="text-sm text-gray-400">
           Campaign: <span className="text-gray-200">{meta.campaign_name}</span> • Product:{" "}
           <span className="text-gray-200">{meta.product_name}</span>
+          {meta.total_rows != null && (
+            <>
+              {" "}• Showing {rows.length} of{" "}
+              <span className="text-gray-200">{meta.total_rows}</span> rows
+            </>
+          )}
         </p>
       )}
       <ContactsTable rows={rows} />
@@ -1,7 +1,38 @@
 import { useEffect, useState } from "react";
-import { getCampaignStatus } from "../lib/api";
+import { getCampaignStatus, subscribeCampaignEvents } from "../lib/api";
 import StatusTable from "../components/StatusTable";
 
+const COUNT_KEYS = ["sent", "delivered", "failed", "replied", "draft"];
+const RESYNC_DELAY_MS = 3000;
+
+// Counts straight from the stream's snapshot (covers deltas missed while the summary loaded)
+function applySnapshot(summary, snapshot) {
+  const next = { ...summary, total_emails: snapshot.total_emails };
+  for (const key of COUNT_KEYS) next[key] = snapshot.status[key] || 0;
+  return next;
+}
+
+// Status values and *_count values in a delta are increments
+function applyDelta(summary, delta) {
+  const next = { ...summary };
+  for (const [key, change] of Object.entries(delta.status)) {
+    if (COUNT_KEYS.includes(key)) next[key] += change;
+  }
+  const emails = delta.emails || {};
+  next.sent_emails = summary.sent_emails.map((row) => {
+    const patch = emails[row.id];
+    if (!patch) return row;
+    return {
+      ...row,
+      status: patch.status || row.status,
+      open_count: row.open_count + (patch.open_count || 0),
+      click_count: row.click_count + (patch.click_count || 0),
+      bounce: row.bounce || Boolean(patch.bounce),
+    };
+  });
+  return next;
+}
+
 export default function StatusPage() {
   const [campaignId, setCampaignId] = useState(null);
   const [summary, setSummary] = useState(null);
@@ -13,20 +44,50 @@ export default function StatusPage() {
   }, []);
 
   useEffect(() => {
+    if (!campaignId) return;
+    let closeStream = () => {};
+    let resyncTimer = null;
+    let active = true;
+
     const fetchStatus = async () => {
-      if (!campaignId) return;
       setLoading(true);
       try {
         const data = await getCampaignStatus(campaignId);
-        setSummary(data);
+        if (active) setSummary(data);
       } catch (err) {
         console.error(err);
         alert("Failed to fetch status");
       } finally {
-        setLoading(false);
+        if (active) setLoading(false);
       }
     };
-    fetchStatus();
+
+    const connect = () => {
+      closeStream = subscribeCampaignEvents(campaignId, {
+        onSnapshot: (snapshot) => setSummary((s) => s && applySnapshot(s, snapshot)),
+        onDelta: (delta) => {
+          if (delta.emails_truncated) fetchStatus();
+          else setSummary((s) => s && applyDelta(s, delta));
+        },
+        onResync: () => {
+          closeStream();
+          resyncTimer = setTimeout(async () => {
+            if (!active) return;
+            await fetchStatus();
+            if (active) connect();
+          }, RESYNC_DELAY_MS);
+        },
+      });
+    };
+
+    fetchStatus().then(() => {
+      if (active) connect();
+    });
+    return () => {
+      active = false;
+      clearTimeout(resyncTimer);
+      closeStream();
+    };
   }, [campaignId]);
 
   return (
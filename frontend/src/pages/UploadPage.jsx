@@ -31,6 +31,8 @@ export default function UploadPage() {
           campaign_name: campaignName || "My Campaign",
           product_name: productName || "My Product",
           product_description: productDescription || "",
+          import_id: res.import_id,
+          total_rows: res.stats?.total_rows,
         })
       );
       navigate("/preview");